@@ -0,0 +1,265 @@
+"""Benchmark suite for the inventory operations in code.py.
+
+For each --sizes catalog size a fresh process generates a seeded catalog
+with generate_sample_data, then runs every menu operation --repeat times,
+answering its prompts from a script and discarding what it prints. Each
+operation reports latency percentiles, rows per second and peak RSS.
+
+    python benchmarks/bench_operations.py --sizes 1000 100000
+    python benchmarks/bench_operations.py --output new.json --baseline old.json --threshold 0.2
+
+With --baseline, any operation whose median time or peak RSS grew by more
+than --threshold over the baseline run fails the benchmark.
+"""
+import argparse
+import builtins
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from load_generator import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [1000, 100_000, 1_000_000]
+
+# Products per imported file, as a fraction of the catalog.
+IMPORT_FRACTION = 0.1
+
+
+def _reset_peak_rss():
+    # Linux resets VmHWM to the current RSS when 5 is written here.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+@contextlib.contextmanager
+def scripted(*answers):
+    """Answer input() prompts from answers and send printed output to devnull."""
+    replies = iter(answers)
+    prompt = builtins.input
+    builtins.input = lambda message="": next(replies)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input = prompt
+
+
+def operations(path, workdir, size, import_path, import_rows):
+    """[(name, rows handled per run, run, cold)]; cold runs start without a loaded store."""
+    import code
+
+    manager = code.SalesManager(path)
+    export_base = os.path.join(workdir, "exported_inventory")
+
+    def menu(function, *answers):
+        def run():
+            with scripted(*answers):
+                function(path)
+        return run
+
+    def export(export_format):
+        def run():
+            with scripted():
+                code.export_inventory(path, export_base, export_format)
+        return run
+
+    def forecast():
+        with scripted():
+            manager.forecast_inventory(3)
+
+    return [
+        ("load_inventory", size, lambda: code.load_inventory(path), True),
+        ("inventory_report", size, menu(code.inventory_report), False),
+        ("search_product", size, menu(code.search_product, "mug"), False),
+        ("filtering_price", size, menu(code.filtering, "1", "10", "50"), False),
+        ("filtering_category", size, menu(code.filtering, "2", "books"), False),
+        ("filtering_stock", size, menu(code.filtering, "3", "2"), False),
+        ("product_sorting_name", size, menu(code.product_sorting, "1"), False),
+        ("product_sorting_price", size, menu(code.product_sorting, "2"), False),
+        ("product_sorting_value", size, menu(code.product_sorting, "4"), False),
+        ("export_inventory_csv", size, export("csv"), False),
+        ("export_inventory_json", size, export("json"), False),
+        ("forecast_inventory", size, forecast, False),
+        ("discount", size, menu(code.discount, "electronics", "10"), False),
+        ("import_inventory", import_rows, menu(code.import_inventory, import_path), False),
+    ]
+
+
+def run_size(size, repeat, warmup, seed):
+    """Results for one catalog size, measured in this process."""
+    import inventory_store
+    from inventory_cache import result_cache
+    from inventory_management import generate_sample_data
+    from inventory_sample import write_sample
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "inventory.csv")
+        import_path = os.path.join(workdir, "import.csv")
+        import_rows = max(1, int(size * IMPORT_FRACTION))
+        results = {}
+
+        _reset_peak_rss()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with scripted():
+                generate_sample_data(path, size, seed=seed)
+            samples.append(time.perf_counter() - start)
+        results["generate_sample_data"] = _summary(samples, size, _peak_rss_mb())
+        write_sample(import_path, import_rows, seed + 1)
+
+        for name, rows, run, cold in operations(path, workdir, size, import_path, import_rows):
+            for _ in range(0 if cold else warmup):
+                run()
+            _reset_peak_rss()
+            samples = []
+            for _ in range(repeat):
+                result_cache.clear()
+                if cold:
+                    for store in inventory_store._stores.values():
+                        store.wait()
+                    inventory_store._stores.clear()
+                start = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - start)
+            results[name] = _summary(samples, rows, _peak_rss_mb())
+        for store in inventory_store._stores.values():
+            store.wait()
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _summary(samples, rows, peak_rss_mb):
+    p50 = percentile(samples, 0.5)
+    return {
+        "runs": len(samples),
+        "rows": rows,
+        "min_ms": min(samples) * 1000,
+        "p50_ms": p50 * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "max_ms": max(samples) * 1000,
+        "rows_per_sec": rows / p50 if p50 else None,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def regressions(results, baseline, threshold, min_ms, min_mb):
+    """Lines describing every operation that got slower or bigger than threshold allows."""
+    found = []
+    for size, operations in results.items():
+        for name, new in operations.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None:
+                continue
+            if old["p50_ms"] >= min_ms and new["p50_ms"] > old["p50_ms"] * (1 + threshold):
+                found.append(f"{name} at {size} rows: p50 {old['p50_ms']:.1f} -> {new['p50_ms']:.1f} ms")
+            growth = new["peak_rss_mb"] - old["peak_rss_mb"]
+            if growth >= min_mb and growth > old["peak_rss_mb"] * threshold:
+                found.append(f"{name} at {size} rows: peak RSS {old['peak_rss_mb']:.0f} -> "
+                             f"{new['peak_rss_mb']:.0f} MB")
+    return found
+
+
+def print_table(size, operations):
+    print(f"\n{size:,} products")
+    print(f"  {'operation':<24}{'p50 ms':>10}{'p95 ms':>10}{'rows/sec':>14}{'peak MB':>10}")
+    for name, result in operations.items():
+        rate = f"{result['rows_per_sec']:,.0f}" if result["rows_per_sec"] else "-"
+        print(f"  {name:<24}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{rate:>14}"
+              f"{result['peak_rss_mb']:>10.0f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--size":
+        # One catalog size, in a process of its own so peak RSS and the
+        # store and result caches start clean.
+        size, repeat, warmup, seed = (int(value) for value in sys.argv[2:6])
+        sys.path.insert(0, ROOT)
+        os.chdir(tempfile.gettempdir())
+        print(json.dumps(run_size(size, repeat, warmup, seed)))
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before each operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed growth over the baseline, as a fraction")
+    parser.add_argument("--min-ms", type=float, default=5.0,
+                        help="ignore time regressions on operations faster than this in the baseline")
+    parser.add_argument("--min-mb", type=float, default=32.0,
+                        help="ignore peak RSS growth smaller than this")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--size", str(size), str(args.repeat),
+             str(args.warmup), str(args.seed)],
+            stdout=subprocess.PIPE, text=True, check=True,
+        ).stdout
+        results[str(size)] = json.loads(output.splitlines()[-1])
+        print_table(size, results[str(size)])
+
+    sys.path.insert(0, ROOT)
+    from inventory_columns import have_numpy
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": have_numpy(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        found = regressions(results, baseline, args.threshold, args.min_ms, args.min_mb)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Startup benchmark for inventory_management.py.
+
+Measures time-to-menu (process start until the menu is printed) and the
+per-module import cost reported by python -X importtime.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --max-ms 300
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MENU_LAST_LINE = "17. Exit"
+
+
+def time_to_menu():
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "inventory_management.py"],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    elapsed = None
+    for line in process.stdout:
+        if line.strip() == MENU_LAST_LINE:
+            elapsed = time.perf_counter() - start
+            break
+    # Closing stdin ends the menu loop with EOFError.
+    process.stdin.close()
+    process.stdout.close()
+    process.wait()
+    if elapsed is None:
+        raise RuntimeError("inventory_management.py exited before showing the menu")
+    return elapsed
+
+
+def import_times():
+    """[(cumulative us, self us, module)] from python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import inventory_management"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--max-ms", type=float, help="fail if the median time-to-menu is above this")
+    args = parser.parse_args()
+
+    samples = [time_to_menu() * 1000 for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"Time to menu over {args.runs} runs: median {median:.1f} ms, "
+          f"min {min(samples):.1f} ms, max {max(samples):.1f} ms")
+
+    rows = import_times()
+    print(f"\nSlowest imports (cumulative, of {len(rows)} modules):")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nFAIL: median time to menu {median:.1f} ms is above {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
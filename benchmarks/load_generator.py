@@ -0,0 +1,154 @@
+"""Load generator for inventory_service.py.
+
+Opens --clients keep-alive connections that send a mix of reads (report,
+search, filter, forecast, single product) and --write-ratio writes for
+--seconds, then prints throughput, latency percentiles and the service's
+coalescing and group-commit counters.
+
+    python benchmarks/load_generator.py --spawn
+    python benchmarks/load_generator.py --url http://127.0.0.1:8765 --clients 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READS = [
+    "/report",
+    "/forecast?months=3",
+    "/search?q={word}",
+    "/products?stock_status=low%20stock",
+    "/products?min_price=10&max_price=50&order_by=price",
+    "/products/{product_id}",
+]
+
+
+async def request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1")
+        + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    return status, payload
+
+
+async def client(host, port, deadline, write_ratio, product_ids, words, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < write_ratio:
+                kind = "write"
+                method, path = "POST", "/products"
+                body = {"product_id": rng.choice(product_ids), "quantity": rng.randint(0, 100)}
+            else:
+                kind = "read"
+                method, body = "GET", None
+                path = rng.choice(READS).format(word=rng.choice(words), product_id=rng.choice(product_ids))
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, method, path, body)
+            latencies[kind].append(time.perf_counter() - start)
+            if status != 200:
+                errors.append((status, path))
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(args, host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, products = await request(reader, writer, "GET", "/products")
+    writer.close()
+    product_ids = [product["product_id"] for product in products] or ["P00001"]
+    words = sorted({word.lower() for product in products for word in product["name"].split() if len(word) > 2}) or ["a"]
+
+    latencies = {"read": [], "write": []}
+    errors = []
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(*(
+        client(host, port, deadline, args.write_ratio, product_ids, words, latencies, errors)
+        for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+
+    total = len(latencies["read"]) + len(latencies["write"])
+    print(f"{total} requests from {args.clients} clients in {elapsed:.1f} s: {total / elapsed:,.0f} req/s")
+    for kind, values in latencies.items():
+        if values:
+            print(f"  {kind:<5} {len(values):>7}  mean {statistics.mean(values) * 1000:7.2f} ms  "
+                  f"p50 {percentile(values, 0.5) * 1000:7.2f}  p95 {percentile(values, 0.95) * 1000:7.2f}  "
+                  f"p99 {percentile(values, 0.99) * 1000:7.2f}")
+    print(f"  errors {len(errors)}")
+    if stats.get("commits"):
+        print(f"  reads coalesced {stats['coalesced']} of {stats['reads']}; "
+              f"{stats['writes']} writes in {stats['commits']} commits "
+              f"({stats['writes'] / stats['commits']:.1f} per fsync)")
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start a service on a temporary copy of inventory.csv for the run")
+    parser.add_argument("--file", default=os.path.join(ROOT, "inventory.csv"), help="inventory to copy with --spawn")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    if not args.spawn:
+        return asyncio.run(run(args, host, port))
+
+    workdir = tempfile.mkdtemp()
+    inventory = os.path.join(workdir, "inventory.csv")
+    shutil.copy(args.file, inventory)
+    service = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "inventory_service.py"), "--file", inventory, "--port", str(port)],
+        cwd=workdir, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        service.stdout.readline()  # "listening on ..."
+        return asyncio.run(run(args, host, port))
+    finally:
+        service.terminate()
+        service.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
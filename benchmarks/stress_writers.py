@@ -0,0 +1,151 @@
+"""Concurrent writer stress test for the CSV inventory store.
+
+Starts --processes writer processes against one temporary inventory. Each
+runs --iterations transactions that read a shared counter product, add one
+to its quantity and add a product of its own, while a reader process keeps
+reloading the catalog. A small compaction threshold makes the writers fold
+the journal into the CSV under each other's feet.
+
+Afterwards the counter must equal processes * iterations and every added
+product must be present: a lost update or a torn read fails the run.
+
+    python benchmarks/stress_writers.py
+    python benchmarks/stress_writers.py --processes 16 --iterations 200
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inventory_product import Product  # noqa: E402
+from inventory_store import InventoryStore  # noqa: E402
+
+COUNTER = "STRESS-COUNTER"
+
+
+def writer(path, worker, iterations, compact_threshold):
+    store = InventoryStore(path, compact_threshold=compact_threshold)
+    attempts = 0
+
+    def increment(store):
+        nonlocal attempts
+        attempts += 1
+        counter = store.get(COUNTER).copy()
+        counter.quantity += 1
+        store.put(counter)
+        store.put(Product(f"W{worker}-{i}", f"Stress {worker} {i}", "Stress", 1.0, 1, "2024-01-01 00:00:00"))
+
+    for i in range(iterations):
+        store.transact(increment)
+    store.wait()
+    print(attempts - iterations)
+
+
+def reader(path, stop_path):
+    store = InventoryStore(path)
+    loads = 0
+    last = 0
+    while not os.path.exists(stop_path):
+        store.refresh()
+        count = store.get(COUNTER).quantity
+        if count < last:
+            print(f"counter went back from {last} to {count}")
+            return 1
+        last = count
+        loads += 1
+    print(loads)
+    return 0
+
+
+def run(args):
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "inventory.csv")
+    stop_path = os.path.join(workdir, "stop")
+    try:
+        if args.file:
+            shutil.copy(args.file, path)
+        store = InventoryStore(path)
+        store.refresh()
+        store.transact(lambda store: store.put(Product(COUNTER, "Stress Counter", "Stress", 1.0, 0, "2024-01-01 00:00:00")))
+        store.compact()
+        initial = len(store)
+
+        script = os.path.abspath(__file__)
+        start = time.perf_counter()
+        reading = subprocess.Popen(
+            [sys.executable, script, "--read", path, stop_path], stdout=subprocess.PIPE, text=True,
+        )
+        writers = [
+            subprocess.Popen(
+                [sys.executable, script, "--write", path, str(worker), str(args.iterations),
+                 str(args.compact_bytes)],
+                stdout=subprocess.PIPE, text=True,
+            )
+            for worker in range(args.processes)
+        ]
+        outputs = [process.communicate()[0] for process in writers]
+        elapsed = time.perf_counter() - start
+        open(stop_path, "w").close()
+        read_output = reading.communicate()[0]
+
+        failures = []
+        if any(process.returncode for process in writers):
+            failures.append("a writer process failed")
+        if reading.returncode:
+            failures.append(f"reader: {read_output.strip()}")
+        retries = sum(int(output) for output in outputs if output.strip().isdigit())
+
+        final = InventoryStore(path)
+        expected = args.processes * args.iterations
+        counter = final.get(COUNTER).quantity
+        if counter != expected:
+            failures.append(f"counter is {counter}, expected {expected}")
+        missing = [
+            f"W{worker}-{i}" for worker in range(args.processes) for i in range(args.iterations)
+            if f"W{worker}-{i}" not in final
+        ]
+        if missing:
+            failures.append(f"{len(missing)} added products missing, e.g. {missing[0]}")
+        if len(final) != initial + expected:
+            failures.append(f"{len(final)} products, expected {initial + expected}")
+        leftovers = [name for name in os.listdir(workdir) if name.endswith(".tmp")]
+        if leftovers:
+            failures.append(f"temporary files left behind: {', '.join(leftovers)}")
+
+        print(f"{expected} transactions from {args.processes} processes in {elapsed:.1f} s: "
+              f"{expected / elapsed:,.0f}/s, {retries} retried after a conflict")
+        print(f"  reader loaded the catalog {read_output.strip()} times")
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        if not failures:
+            print("  OK no lost updates")
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--write":
+        path, worker, iterations, compact_bytes = sys.argv[2:6]
+        return writer(path, int(worker), int(iterations), int(compact_bytes))
+    if len(sys.argv) > 1 and sys.argv[1] == "--read":
+        return reader(*sys.argv[2:4])
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--file", default=os.path.join(ROOT, "inventory.csv"),
+                        help="inventory to start from (copied); empty for an empty one")
+    parser.add_argument("--compact-bytes", type=int, default=16 * 1024,
+                        help="journal size at which writers compact")
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
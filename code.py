@@ -1,30 +1,38 @@
-import csv
 from datetime import datetime
 import os
-import re
-import json
-import matplotlib.pyplot as plt
-
-
+from inventory_actions import (ActionError, category_error, create_product, discount_category, edit_product,
+                               export_products, find_products, forecast_demand, report_totals)
+from inventory_export import export_rows
+from inventory_forecast import seasonal_multiplier
+from inventory_history import ValueHistory, history_path
+from inventory_import import import_file
+from inventory_metrics import operation
+from inventory_pager import list_pages, show_pages
+from inventory_product import validate_row
+from inventory_query import Query
+from inventory_store import get_store
+from inventory_trend import TREND_POINTS, render_trend
+
+
+@operation("load_inventory")
 def load_inventory(file_path="inventory.csv"):
-    with open(file_path, mode='r', newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
-        return list(reader)
+    return get_store(file_path).rows()
 
 
 # show products
 
 
+@operation("show_all_products")
 def show_all_products(file_path="inventory.csv"):
     inventory = load_inventory(file_path)
     print(f"\nShowing {len(inventory)} products:\n")
-    for k in inventory:
-        print(f"{k['product_id']} | {k['name']} | {k['category']} | R{k['price']} | Qty: {k['quantity']}")
+    show_pages(list_pages(inventory))
 
 
 # new product
 
 
+@operation("add_product")
 def add_product(file_path="inventory.csv"):
     print("\nAdd New Product:")
     product_id = input("Enter product ID: ").strip()
@@ -32,18 +40,16 @@ def add_product(file_path="inventory.csv"):
 
     while True:
         category = input("Enter category: ").strip().title()
-        if not category:
-            print("Category cannot be empty.")
-        elif len(category) > 20:
-            print("Category name too long (max 20 characters).")
-        elif not re.match(r'^[A-Za-z0-9 ]+$', category):
-            print("Category can only contain letters, numbers, and spaces.")
-        else:
+        error = category_error(category)
+        if error is None:
             break
+        print(error)
 
-    inventory = load_inventory(file_path)
-    existing_names = {item['name'].strip().lower() for item in inventory}
-    if name.lower() in existing_names:
+    store = get_store(file_path)
+    if product_id in store:
+        print(f"Error: A product with ID '{product_id}' already exists.")
+        return
+    if store.has_name(name):
         print(f"Error: A product named '{name}' already exists.")
         return
 
@@ -59,93 +65,80 @@ def add_product(file_path="inventory.csv"):
         print("Invalid input.")
         quantity = 0
 
-    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    new_product = {
-        "product_id": product_id,
-        "name": name,
-        "category": category,
-        "price": price,
-        "quantity": quantity,
-        "last_updated": last_updated
-    }
-
-    inventory.append(new_product)
-
-    fieldnames = ["product_id", "name", "category", "price", "quantity", "last_updated"]
-    with open(file_path, mode='w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(inventory)
+    try:
+        store.transact(lambda store: create_product(store, product_id, name, category, price, quantity))
+    except ActionError as e:
+        print(f"Error: {e}")
+        return
 
     print(f"Product '{name}' added successfully.")
 
 # update products
 
 
+def _row(store, product):
+    # The row with the inventory file's columns, as it reads in the CSV.
+    return {field: product.get(field, "") for field in store.fieldnames}
+
+
+@operation("update_product")
 def update_product(file_path="inventory.csv"):
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
+    if not len(store):
         print("No inventory data found.")
         return
 
     product_id = input("Enter the product ID to update: ").strip()
 
-    product = next((pr for pr in inventory if pr["product_id"] == product_id), None)
+    product = store.get(product_id)
+    if product:
+        product = product.copy()
 
     if not product:
         print("Product not found.")
         return
 
-    print(f"Current details for {product_id}: {product}")
+    print(f"Current details for {product_id}: {_row(store, product)}")
 
+    # None keeps the current value.
     name_input = input(f"Enter new name [{product['name']}]: ").strip()
-    name = name_input.title() if name_input else product['name']
+    name = name_input.title() if name_input else None
 
     while True:
         category_input = input(f"Enter new category [{product['category']}]: ").strip()
         if not category_input:
-            category = product['category']
+            category = None
             break
-        category_input = category_input.title()
-        if len(category_input) > 20:
-            print("Category name too long (max 20 characters).")
-        elif not re.match(r'^[A-Za-z0-9 ]+$', category_input):
-            print("Category can only contain letters, numbers, and spaces.")
-        else:
-            category = category_input
+        category = category_input.title()
+        error = category_error(category)
+        if error is None:
             break
+        print(error)
 
     try:
         price_input = input(f"Enter new price [{product['price']}]: ").strip()
-        price = float(price_input) if price_input else float(product['price'])
+        price = float(price_input) if price_input else None
     except ValueError:
         print("Invalid price input. Keeping original.")
-        price = float(product['price'])
+        price = None
 
     try:
         quantity_input = input(f"Enter new quantity [{product['quantity']}]: ").strip()
-        quantity = int(quantity_input) if quantity_input else int(product['quantity'])
+        quantity = int(quantity_input) if quantity_input else None
     except ValueError:
         print("Invalid quantity input. Keeping original.")
-        quantity = int(product['quantity'])
-
-    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        quantity = None
 
-    product["name"] = name
-    product["category"] = category
-    product["price"] = price
-    product["quantity"] = quantity
-    product["last_updated"] = last_updated
-
-    print(f"Updated details: {product}")
+    # Applied to the latest copy of the product, again if another process
+    # saves first.
+    try:
+        product = store.transact(lambda store: edit_product(store, product_id, name, category, price, quantity))
+    except ActionError as e:
+        print(e)
+        return
 
-    fieldnames = ["product_id", "name", "category", "price", "quantity", "last_updated"]
-    with open(file_path, mode='w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(inventory)
+    print(f"Updated details: {_row(store, product)}")
 
     print("Product updated successfully.")
 
@@ -153,51 +146,32 @@ def update_product(file_path="inventory.csv"):
 # product search
 
 
+@operation("search_product")
 def search_product(file_path="inventory.csv"):
     find = input("Enter product ID or name: ").strip().lower()
 
-    inventory = load_inventory(file_path)
-
-    product = [
-        i for i in inventory if find in i['product_id'].lower() or find in i['name'].lower()
-    ]
+    product = find_products(get_store(file_path), find)
 
     if product:
         print(f"\nFound {len(product)} product(s):\n")
-        for j in product:
-            print(f"{j['product_id']} | {j['name']} | {j['category']} | R{j['price']} | Qty: {j['quantity']}")
+        show_pages(list_pages(product))
     else:
         print("Product does not exist.")
 
 
 # inventory report
 
+@operation("inventory_report")
 def inventory_report(file_path="inventory.csv"):
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
+    if not len(store):
         print("Inventory is empty.")
         return
 
-    total_products = len(inventory)
-    total_quantity = 0
-    total_value = 0.0
-    count = {}
-
     print("\nInventory Report")
 
-    for total in inventory:
-        quantity = int(total['quantity'])
-        price = float(total['price'])
-        category = total['category']
-
-        total_quantity += quantity
-        total_value += price * quantity
-
-        if category in count:
-            count[category] += 1
-        else:
-            count[category] = 1
+    total_products, total_quantity, total_value, count = report_totals(store)
 
     print(f"\nTotal number of products: {total_products}")
     print(f"Total quantity: {total_quantity}")
@@ -211,7 +185,19 @@ def inventory_report(file_path="inventory.csv"):
 # export data
 
 
+@operation("export_data")
 def export_data(file_path="inventory.csv", path="inventory.csv"):
+    store = get_store(file_path)
+    store.compact()
+
+    if store.backend != "csv":
+        try:
+            export_rows((item.to_row() for item in store.rows()), path, "csv", store.fieldnames)
+            print(f"Successfully exported to '{path}'.")
+        except Exception as e:
+            print(f"Error in export {e}")
+        return
+
     if not os.path.exists(file_path):
         print(f"Error: '{file_path}' not found.")
         return
@@ -228,10 +214,11 @@ def export_data(file_path="inventory.csv", path="inventory.csv"):
 # product sorting
 
 
+@operation("product_sorting")
 def product_sorting(file_path="inventory.csv"):
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
+    if not len(store):
         print("No items in inventory.")
         return
 
@@ -239,30 +226,28 @@ def product_sorting(file_path="inventory.csv"):
     print("1. A-Z")
     print("2. Price from low to high")
     print("3. Quantity from low to high")
-    choice = input("How would you like to sort it (1-3): ").strip()
+    print("4. Stock value from high to low")
+    choice = input("How would you like to sort it (1-4): ").strip()
 
-    if choice == "1":
-        inventory_sort = sorted(inventory, key=lambda x: x['name'].lower())
-    elif choice == "2":
-        inventory_sort = sorted(inventory, key=lambda x: float(x['price']))
-    elif choice == "3":
-        inventory_sort = sorted(inventory, key=lambda x: int(x['quantity']))
-    else:
+    orders = {"1": ("name", False), "2": ("price", False), "3": ("quantity", False), "4": ("value", True)}
+    if choice not in orders:
         print("Option does not exist, please choose a valid option.")
         return
+    field, reverse = orders[choice]
 
-    print(f"\nSorted Products ({len(inventory_sort)}):\n")
-    for item in inventory_sort:
-        print(f"{item['product_id']} | {item['name']} | {item['category']} | R{item['price']} | Qty: {item['quantity']}")
+    # Only the pages actually shown get sorted out of the catalog.
+    print(f"\nSorted Products ({len(store)}):\n")
+    show_pages(lambda cursor, limit: store.page(field, limit, cursor, reverse))
 
 
 # data filtering
 
 
+@operation("filtering")
 def filtering(file_path="inventory.csv"):
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
+    if not len(store):
         print("Empty.")
         return
 
@@ -280,15 +265,11 @@ def filtering(file_path="inventory.csv"):
             print("Invalid input.")
             return
 
-        filtered = [
-            i for i in inventory if min_price <= float(i['price']) <= max_price
-        ]
+        query = Query().price_between(min_price, max_price).order_by("price")
 
     elif choice == "2":
         category = input("Category to Filter by: ").strip().lower()
-        filtered = [
-            i for i in inventory if i['category'].strip().lower() == category
-        ]
+        query = Query().category(category)
 
     elif choice == "3":
         print("1. In Stock")
@@ -297,11 +278,11 @@ def filtering(file_path="inventory.csv"):
         position = input("Select stock status (1-3): ").strip()
 
         if position == "1":
-            filtered = [r for r in inventory if int(r['quantity']) > 0]
+            query = Query().quantity_between(1).order_by("quantity")
         elif position == "2":
-            filtered = [r for r in inventory if 0 < int(r['quantity']) <= 10]
+            query = Query().quantity_between(1, 10).order_by("quantity")
         elif position == "3":
-            filtered = [r for r in inventory if int(r['quantity']) == 0]
+            query = Query().quantity_between(0, 0).order_by("quantity")
         else:
             print("Invalid option.")
             return
@@ -309,49 +290,40 @@ def filtering(file_path="inventory.csv"):
         print("Invalid filter choice.")
         return
 
+    filtered = query.run(store)
+
     if filtered:
         print(f"\nFiltered Products ({len(filtered)}):\n")
-        for item in filtered:
-            print(f"{item['product_id']} | {item['name']} | {item['category']} | R{item['price']} | Qty: {item['quantity']}")
+        show_pages(list_pages(filtered))
     else:
         print("No products match the selected filter.")
 
 # batch updates/ discounts
 
 
+@operation("discount")
 def discount(file_path="inventory.csv"):
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
+    if not len(store):
         print("Inventory empty.")
         return
 
     category = input("Category to add discount to: ").strip().lower()
     try:
         added_discount = float(input("Enter discount percentage (e.g., 10 for 10%): "))
-        if added_discount <= 0 or added_discount >= 100:
-            print("Please enter a valid percentage between 0 and 100.")
-            return
     except ValueError:
         print("Invalid percentage input.")
         return
 
-    updated = False
-    for product in inventory:
-        if product["category"].strip().lower() == category:
-            old_price = float(product["price"])
-            new_price = round(old_price * (1 - added_discount / 100), 2)
-            product["price"] = new_price
-            product["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            updated = True
-
-    if updated:
-        fieldnames = ["product_id", "name", "category", "price", "quantity", "last_updated"]
-        with open(file_path, mode='w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(inventory)
-        print(f"\nDiscount of {discount}% applied to all products in category '{category}'.")
+    try:
+        changed = store.transact(lambda store: discount_category(store, category, added_discount))
+    except ActionError as e:
+        print(e)
+        return
+
+    if changed:
+        print(f"\nDiscount of {added_discount}% applied to all products in category '{category}'.")
     else:
         print(f"No products found '{category}'.")
 
@@ -360,20 +332,10 @@ def discount(file_path="inventory.csv"):
 
 
 def validate_product_row(row):
-    try:
-        product = {
-            "product_id": row["product_id"].strip(),
-            "name": row["name"].strip().title(),
-            "category": row["category"].strip().title(),
-            "price": round(float(row["price"]), 2),
-            "quantity": int(row["quantity"]),
-            "last_updated": row["last_updated"].strip()
-        }
-        return product
-    except (KeyError, ValueError):
-        return None
+    return validate_row(row)
 
 
+@operation("import_inventory")
 def import_inventory(file_path="inventory.csv"):
     path_import = input("Enter the path to the CSV file: ").strip()
 
@@ -381,44 +343,18 @@ def import_inventory(file_path="inventory.csv"):
         print(f"File does not exist: {path_import}")
         return
 
-    current_inventory = load_inventory(file_path)
-    inventory_id = {item["product_id"]: item for item in current_inventory}
-
-    imported = 0
-    updated = 0
-    invalid = 0
-
-    with open(path_import, mode="r", newline='') as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            validate = validate_product_row(row)
-            if not validate:
-                invalid += 1
-                continue
-
-            product_id = validate["product_id"]
-
-            if product_id in inventory_id:
-                inventory_id[product_id] = validate
-                updated += 1
-            else:
-                inventory_id[product_id] = validate
-                imported += 1
-
-    with open(file_path, mode="w", newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=["product_id", "name", "category", "price", "quantity", "last_updated"])
-        writer.writeheader()
-        writer.writerows(inventory_id.values())
+    result = import_file(path_import, file_path)
 
     print("\n--- Import Information ---")
-    print(f"Imported: {imported} new products")
-    print(f"Updated: {updated} current products")
-    print(f"Invalid rows skipped: {invalid}")
+    print(f"Imported: {result['imported']} new products")
+    print(f"Updated: {result['updated']} current products")
+    print(f"Invalid rows skipped: {result['invalid']}")
+    print(f"Throughput: {result['rows_per_second']:,.0f} rows/sec")
 
 
 # export information
 
+@operation("export_inventory")
 def export_inventory(
     file_path="inventory.csv",
     path_formatted="exported_inventory",
@@ -427,54 +363,26 @@ def export_inventory(
     filters=None
 ):
 
-    if not os.path.exists(file_path):
-        print(f"Error: '{file_path}' not found.")
-        return
-
-    inventory = load_inventory(file_path)
+    store = get_store(file_path)
 
-    if not inventory:
-        print("Data to export is invalid.")
+    # Edits may still be in the journal only, so the store, not the
+    # file, says whether there is anything to export.
+    if not len(store):
+        if not os.path.exists(file_path):
+            print(f"Error: '{file_path}' not found.")
+        else:
+            print("Data to export is invalid.")
         return
 
-    if filters:
-        if "category" in filters:
-            inventory = [i for i in inventory if i["category"].lower() == filters["category"].lower()]
-        if "stock_status" in filters:
-            def get_status(qty):
-                t = int(qty)
-                if t == 0:
-                    return "out of stock"
-                elif t <= 10:
-                    return "low stock"
-                else:
-                    return "in stock"
-            inventory = [q for q in inventory if get_status(q["quantity"]) == filters["stock_status"]]
-
-    if selected_fields:
-        inventory = [
-            {field: item[field] for field in selected_fields if field in item}
-            for item in inventory
-        ]
-
-    extension = "csv" if export_format == "csv" else "json"
-    full_path = f"{path_formatted}.{extension}"
-
+    filters = filters or {}
     try:
-        if export_format == "csv":
-            fieldnames = selected_fields if selected_fields else inventory[0].keys()
-            with open(full_path, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(inventory)
-        elif export_format == "json":
-            with open(full_path, mode='w') as file:
-                json.dump(inventory, file, indent=2)
-        else:
-            print("Unsupported export format.")
-            return
-
-        print(f"Successfully exported {len(inventory)} products to '{full_path}'.")
+        exported, full_path = export_products(
+            store, path_formatted, export_format, selected_fields,
+            category=filters.get("category"), stock_status=filters.get("stock_status")
+        )
+        print(f"Successfully exported {exported} products to '{full_path}'.")
+    except ActionError as e:
+        print(e)
     except Exception as e:
         print(f"Error during export: {e}")
 
@@ -487,49 +395,31 @@ class SalesManager:
 
     def _load_inventory_data(self):
         inventory = {}
-        if not os.path.exists(self.inventory_file):
-            return inventory
-
-        with open(self.inventory_file, mode="r", newline="") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    pid = row["product_id"]
-                    inventory[pid] = {
-                        "name": row.get("name", "Unknown"),
-                        "stock": int(row.get("quantity", 0)),
-                        "monthly_sales": int(row.get("monthly_sales", 0))
-                    }
-                except (KeyError, ValueError):
-                    continue
+        for product in get_store(self.inventory_file).rows():
+            inventory[product.product_id] = {
+                "name": product.name or "Unknown",
+                "stock": product.quantity,
+                "monthly_sales": product.monthly_sales
+            }
         return inventory
 
-    def forecast_inventory(self, months=1):
-        inventory = self._load_inventory_data()
-        today = datetime.now()
-        season_multiplier = self._get_seasonal_multiplier(today.month)
+    @operation("forecast_inventory")
+    def forecast_inventory(self, months=1, history=None):
+        try:
+            result = forecast_demand(get_store(self.inventory_file), months, history)
+        except ActionError as e:
+            print(e)
+            return None
 
         print(f"\nForecasting for next {months} month(s)...\n")
         print(f"{'Product ID':<12}{'Name':<25}{'Current Stock':<15}{'Forecast Demand':<20}{'Status'}")
 
-        for prid, data in inventory.items():
-            stock = data["stock"]
-            name = data["name"]
-            monthly_sales = data["monthly_sales"]
-
-            demand = int(monthly_sales * months * season_multiplier)
-            deficit = demand - stock
-            status = "Still good" if deficit <= 0 else f"Time to restock {deficit}"
-
-            print(f"{prid:<12}{name:<25}{stock:<15}{demand:<20}{status}")
+        for row in result.rows():
+            print(f"{row['product_id']:<12}{row['name']:<25}{row['stock']:<15}{row['forecast_demand']:<20}{row['status']}")
+        return result
 
     def _get_seasonal_multiplier(self, month):
-        seasonal_effects = {
-            12: 1.4,
-            11: 1.2,
-            1: 0.85
-        }
-        return seasonal_effects.get(month, 1.0)
+        return seasonal_multiplier(month)
 
 
 # Inventory value tracking
@@ -538,65 +428,66 @@ class SalesManager:
 class InventoryManager:
     def __init__(self, inventory_file="inventory.csv"):
         self.inventory_file = inventory_file
-        self.inventory_data = self._load_inventory_data()
-        self.inventory_value_history = []
+        self._inventory_data = None
+        self.history = ValueHistory(history_path(inventory_file))
+
+    @property
+    def inventory_data(self):
+        # Parsed on first use, not when the menu starts.
+        if self._inventory_data is None:
+            self._inventory_data = self._load_inventory_data()
+        return self._inventory_data
+
+    @inventory_data.setter
+    def inventory_data(self, value):
+        self._inventory_data = value
 
     def _load_inventory_data(self):
         inventory = {}
-        if not os.path.exists(self.inventory_file):
-            return inventory
-
-        with open(self.inventory_file, mode="r", newline="") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                product_id = row["product_id"]
-                price = float(row["price"])
-                quantity = int(row["quantity"])
-                inventory[product_id] = {
-                    "name": row["name"],
-                    "price": price,
-                    "quantity": quantity,
-                    "last_updated": row["last_updated"]
-                }
+        for product in get_store(self.inventory_file).rows():
+            inventory[product.product_id] = {
+                "name": product.name,
+                "price": product.price,
+                "quantity": product.quantity,
+                "last_updated": product.last_updated
+            }
         return inventory
 
+    @property
+    def inventory_value_history(self):
+        return self.history.entries()
+
+    @operation("log_inventory_value")
     def log_inventory_value(self):
-        total_value = 0
-        for product in self.inventory_data.values():
-            total_value += product["price"] * product["quantity"]
-        self.inventory_value_history.append({"date": datetime.now(), "value": total_value})
+        total_value = get_store(self.inventory_file).total_value()
+        self.history.append(datetime.now(), total_value)
         print(f"Current Inventory Value: R{total_value:.2f}")
 
     def filter_inventory_history_by_date(self, start_date, end_date):
-        filtered_history = [
-            entry for entry in self.inventory_value_history
-            if start_date <= entry['date'] <= end_date
-        ]
-        return filtered_history
+        return self.history.between(start_date, end_date)
 
-    def show_value_trend(self):
-        start_date = datetime(2025, 3, 1)
-        end_date = datetime.now()
+    @operation("show_value_trend")
+    def show_value_trend(self, start_date=None, end_date=None, output=None, points=TREND_POINTS):
+        """Chart the logged values from start_date (default: the first) to end_date (default: now).
 
-        filtered_history = self.filter_inventory_history_by_date(start_date, end_date)
+        With output the chart is written to that .png or .svg file instead
+        of opening a window, which also works without a display.
+        """
+        timestamps, values = self.history.arrays(start_date, end_date or datetime.now())
 
-        if not filtered_history:
+        if not values:
             print("No inventory value data available.")
             return
 
-        dates = [entry['date'] for entry in filtered_history]
-        values = [entry['value'] for entry in filtered_history]
-
-        plt.figure(figsize=(10, 6))
-        plt.plot(dates, values, marker='o', linestyle='-', color='b')
-        plt.title('Inventory Value Trend (1st March 2025 to Today)')
-        plt.xlabel('Date')
-        plt.ylabel('Inventory Value (R)')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.grid(True)
-        plt.show()
+        try:
+            plotted = render_trend(timestamps, values, output, points)
+        except (ValueError, OSError) as e:
+            print(f"Could not draw the chart: {e}")
+            return
+        if output:
+            print(f"Saved the trend of {len(values):,} values ({plotted:,} plotted) to '{output}'.")
 
+    @operation("display_text_trend")
     def display_text_trend(self):
         if not self.inventory_value_history:
             print("No inventory value history available.")
@@ -608,4 +499,19 @@ class InventoryManager:
             print(f"{entry['date'].strftime('%Y-%m-%d %H:%M:%S'):<25} {entry['value']:<20.2f}")
 
 
-inventory_manager = InventoryManager()
+_inventory_manager = None
+
+
+def get_inventory_manager():
+    global _inventory_manager
+    if _inventory_manager is None:
+        _inventory_manager = InventoryManager()
+    return _inventory_manager
+
+
+def __getattr__(name):
+    # Keeps "from code import inventory_manager" working without building
+    # the manager at import time.
+    if name == "inventory_manager":
+        return get_inventory_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
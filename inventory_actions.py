@@ -0,0 +1,270 @@
+"""Inventory operations as plain functions of a store and their arguments.
+
+The menu prompts in code.py and the command line in inventory_cli.py are
+both layered on these. Nothing here prompts or prints. Functions that
+change the catalog only stage the change with put(); the caller saves it,
+normally by running them inside store.transact().
+"""
+import math
+import re
+from datetime import datetime
+
+from inventory_cache import cached
+from inventory_export import export_rows, split_format
+from inventory_forecast import forecast
+from inventory_index import SORT_KEYS
+from inventory_product import Product, parse_count
+from inventory_query import Query
+from inventory_rules import DiscountRule, RuleSet
+
+CATEGORY_PATTERN = re.compile(r'^[A-Za-z0-9 ]+$')
+
+MAX_CATEGORY_LENGTH = 20
+
+SORT_FIELDS = ("name", "price", "quantity", "value")
+
+# Named top-N lists: (sort field, highest first).
+RANKINGS = {
+    "cheapest": ("price", False),
+    "priciest": ("price", True),
+    "lowest-stock": ("quantity", False),
+    "highest-stock": ("quantity", True),
+    "lowest-value": ("value", False),
+    "highest-value": ("value", True),
+}
+
+
+class ActionError(ValueError):
+    """An operation was given arguments it cannot act on; the message says why."""
+
+
+def _timestamp(now=None):
+    return (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def category_error(category):
+    """Why category cannot be used as a category name, or None if it can."""
+    if not category:
+        return "Category cannot be empty."
+    if len(category) > MAX_CATEGORY_LENGTH:
+        return f"Category name too long (max {MAX_CATEGORY_LENGTH} characters)."
+    if not CATEGORY_PATTERN.match(category):
+        return "Category can only contain letters, numbers, and spaces."
+    return None
+
+
+def checked_price(price):
+    """price as a float; ActionError unless it is a finite number of at least 0."""
+    # bool is an int, but True is not a price
+    try:
+        if isinstance(price, bool):
+            raise ValueError
+        value = float(price)
+    except (TypeError, ValueError):
+        raise ActionError(f"Invalid price: {price!r}") from None
+    if not math.isfinite(value) or value < 0:
+        raise ActionError("Price must be a number of at least 0.")
+    return value
+
+
+def checked_quantity(quantity):
+    """quantity as an int; ActionError unless it is a whole number."""
+    try:
+        return parse_count(quantity)
+    except (TypeError, ValueError):
+        raise ActionError(f"Invalid quantity: {quantity!r}; it must be a whole number.") from None
+
+
+def _checked_category(category):
+    category = category.strip().title()
+    error = category_error(category)
+    if error:
+        raise ActionError(error)
+    return category
+
+
+# reads
+
+
+def find_products(store, text):
+    """Products whose product_id or name contains text, case-insensitively."""
+    return store.search(text.strip().lower())
+
+
+def product_query(category=None, min_price=None, max_price=None, min_quantity=None, max_quantity=None,
+                  stock_status=None, order_by=None, reverse=False):
+    """A Query with a filter for each argument given."""
+    query = Query()
+    if category:
+        query.category(category)
+    if min_price is not None or max_price is not None:
+        query.price_between(min_price, max_price)
+    if min_quantity is not None or max_quantity is not None:
+        query.quantity_between(min_quantity, max_quantity)
+    if stock_status:
+        try:
+            query.stock_status(stock_status)
+        except ValueError:
+            raise ActionError(f"Unknown stock status: {stock_status}") from None
+    if order_by:
+        if order_by not in SORT_FIELDS:
+            raise ActionError(f"Cannot sort by {order_by}; use one of {', '.join(SORT_FIELDS)}.")
+        query.order_by(order_by, reverse)
+    return query
+
+
+def list_products(store, **filters):
+    """Products matching the product_query() filters, in catalog order unless order_by is set."""
+    query = product_query(**filters)
+    if not query.filters and query.order is not None:
+        return store.sorted_by(*query.order)
+    return query.run(store)
+
+
+def page_products(store, limit, after=None, **filters):
+    """(up to limit products matching the filters, cursor for the next page or None).
+
+    after is the cursor returned with the previous page. A sorted listing
+    without filters pages through the store; with filters each page runs
+    the query again and continues after the cursor's product.
+    """
+    query = product_query(**filters)
+    if limit < 1:
+        return [], None
+    if not query.filters and query.order is not None:
+        return store.page(query.order[0], limit, after, query.order[1])
+    if after is None:
+        rows = query.run(store, limit=limit + 1)
+    else:
+        rows = query.run(store)
+        for position, product in enumerate(rows):
+            if product.product_id == after[1]:
+                rows = rows[position + 1:position + 2 + limit]
+                break
+        else:
+            raise ActionError("The page cursor matches no product any more; start from the first page.")
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    key = SORT_KEYS[query.order[0]] if query.order is not None else None
+    return rows, (key(rows[-1]) if key else None, rows[-1].product_id)
+
+
+def top_products(store, ranking, n=10, **filters):
+    """The first n products of a RANKINGS list, among those matching the filters."""
+    if ranking not in RANKINGS:
+        raise ActionError(f"Unknown ranking {ranking}; use one of {', '.join(RANKINGS)}.")
+    field, highest = RANKINGS[ranking]
+    if n < 1:
+        return []
+    if not any(value is not None for value in filters.values()):
+        return store.top(field, n, reverse=highest)
+    return product_query(order_by=field, reverse=highest, **filters).run(store, limit=n)
+
+
+def report_totals(store):
+    """(product count, total quantity, total value, {category: product count})."""
+    return cached(store, "inventory_report", (), store.report_totals)
+
+
+def forecast_demand(store, months=1, history=None, today=None):
+    """ForecastResult for every product over the next months."""
+    if months < 1:
+        raise ActionError("Forecast at least one month ahead.")
+    if history is not None:
+        return forecast(store.rows(), months, history=history)
+    # The horizon starts at the current month, so that is part of the key.
+    today = today or datetime.now()
+    return cached(
+        store, "forecast_inventory", (months, today.year, today.month),
+        lambda: forecast(store.rows(), months, start=today)
+    )
+
+
+def export_products(store, path_base, export_format="csv", fields=None, **filters):
+    """Write the products matching filters to path_base.<format>; returns (count, path)."""
+    query = product_query(**filters)
+    file_format, compression = split_format(export_format)
+    if file_format is None:
+        raise ActionError("Unsupported export format.")
+
+    rows = iter(query.run(store))
+    if fields:
+        rows = ({field: item[field] for field in fields if field in item} for item in rows)
+    else:
+        rows = _file_rows(rows, store.fieldnames)
+    path = f"{path_base}.{file_format}{compression}"
+    return export_rows(rows, path, file_format, fields or store.fieldnames), path
+
+
+def _file_rows(products, fieldnames):
+    # Rows with the inventory's own columns, so a file without monthly_sales
+    # does not gain an empty one in JSON; most rows already match.
+    count = len(fieldnames)
+    for product in products:
+        row = product.to_row()
+        if len(row) != count:
+            row = {field: row.get(field, "") for field in fieldnames}
+        yield row
+
+
+# writes
+
+
+def create_product(store, product_id, name, category, price, quantity, now=None):
+    """Stage a new product and return it.
+
+    Names and categories are title-cased; the price must be at least 0 and
+    the quantity a whole number.
+    """
+    if not product_id or not name:
+        raise ActionError("A product needs an ID and a name.")
+    name = name.strip().title()
+    category = _checked_category(category or "")
+    price = checked_price(price)
+    quantity = checked_quantity(quantity)
+    if product_id in store:
+        raise ActionError(f"A product with ID '{product_id}' already exists.")
+    if store.has_name(name):
+        raise ActionError(f"A product named '{name}' already exists.")
+    return store.put(Product(
+        product_id=product_id,
+        name=name,
+        category=category,
+        price=price,
+        quantity=quantity,
+        last_updated=_timestamp(now)
+    ))
+
+
+def edit_product(store, product_id, name=None, category=None, price=None, quantity=None, now=None):
+    """Stage new values for the fields given and return the updated product."""
+    product = store.get(product_id)
+    if product is None:
+        raise ActionError("Product not found.")
+    if category is not None:
+        category = _checked_category(category)
+    if price is not None:
+        price = checked_price(price)
+    if quantity is not None:
+        quantity = checked_quantity(quantity)
+    updated = product.copy()
+    if name is not None:
+        updated.name = name.strip().title()
+    if category is not None:
+        updated.category = category
+    # Unchanged numbers keep the text they were read with.
+    if price is not None and price != updated.price:
+        updated.price = price
+    if quantity is not None and quantity != updated.quantity:
+        updated.quantity = quantity
+    updated.last_updated = _timestamp(now)
+    return store.put(updated)
+
+
+def discount_category(store, category, percent, dry_run=False, now=None):
+    """Stage percent off every product in category; returns the preview rows."""
+    if percent <= 0 or percent >= 100:
+        raise ActionError("Please enter a valid percentage between 0 and 100.")
+    rules = RuleSet([DiscountRule(percent, categories=[category.strip().lower()])])
+    return rules.stage(store, dry_run=dry_run, now=now)
@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from inventory_actions import ActionError, category_error, checked_price
+from inventory_product import parse_count
+from inventory_store import get_store
+
+FIELDS = ("name", "category", "price", "quantity", "last_updated", "monthly_sales")
+
+
+class Batch:
+    """Price and stock changes applied to the catalog as one transaction.
+
+    Queue changes with update(), update_category() and update_where(), then
+    call commit(). A change value can be a plain value or a function of
+    the product, e.g. price=lambda product: product.price * 0.9. Selectors
+    match the catalog as it was before the batch (categories case-
+    insensitively, as discounts and filters do), and a product matched by
+    several changes gets them in the order they were queued.
+
+    Every change is computed and validated before anything is written, so
+    an invalid value or unknown product_id raises and leaves the catalog
+    untouched. The result is journaled as a single record.
+    """
+
+    def __init__(self, file_path="inventory.csv", store=None):
+        self.store = store or get_store(file_path)
+        self._by_id = {}
+        self._by_category = {}
+        self._predicates = []
+        self._count = 0
+
+    def _queue(self, changes):
+        for field in changes:
+            if field not in FIELDS:
+                raise ValueError(f"unknown field: {field!r}")
+        self._count += 1
+        return self._count, changes
+
+    def update(self, product_id, **changes):
+        self._by_id.setdefault(product_id, []).append(self._queue(changes))
+        return self
+
+    def update_category(self, category, **changes):
+        self._by_category.setdefault(category.strip().lower(), []).append(self._queue(changes))
+        return self
+
+    def update_where(self, predicate, **changes):
+        self._predicates.append((predicate, self._queue(changes)))
+        return self
+
+    def __len__(self):
+        return self._count
+
+    def plan(self):
+        """[(current product, changed copy)] for every product the batch changes."""
+        products = self.store.rows()
+        known = {product.product_id for product in products}
+        missing = [product_id for product_id in self._by_id if product_id not in known]
+        if missing:
+            raise KeyError(f"unknown product_id: {', '.join(missing)}")
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        planned = []
+        # One pass over the catalog; each product looks up its own changes.
+        for product in products:
+            matched = self._by_id.get(product.product_id, []) + \
+                self._by_category.get(product.category.strip().lower(), [])
+            matched += [change for predicate, change in self._predicates if predicate(product)]
+            if not matched:
+                continue
+            matched.sort(key=lambda change: change[0])
+            changed = product.copy()
+            for _, changes in matched:
+                for field, value in changes.items():
+                    if callable(value):
+                        value = value(changed)
+                    _set_field(changed, field, value)
+            if changed.to_row() != product.to_row():
+                if not any("last_updated" in changes for _, changes in matched):
+                    changed.last_updated = now
+                planned.append((product, changed))
+        return planned
+
+    def diff(self):
+        """[{product_id, field, old, new}] for every value the batch would change."""
+        return _diff(self.plan())
+
+    def commit(self, dry_run=False):
+        """Apply the batch in one atomic write and return its diff.
+
+        With dry_run=True nothing is written.
+        """
+        if dry_run:
+            return _diff(self.plan())
+
+        # Planned again from the fresh catalog if another process writes first.
+        def apply(store):
+            planned = self.plan()
+            store.commit(changed for _, changed in planned)
+            return _diff(planned)
+
+        return self.store.transact(apply)
+
+
+def _set_field(product, field, value):
+    if field == "price":
+        try:
+            value = round(checked_price(value), 2)
+        except ActionError as e:
+            raise ValueError(f"{product.product_id}: {e}") from None
+    elif field in ("quantity", "monthly_sales"):
+        try:
+            value = parse_count(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{product.product_id}: {field} must be a whole number, not {value!r}") from None
+        if value < 0:
+            raise ValueError(f"{product.product_id}: {field} cannot be negative")
+    elif field == "category":
+        value = str(value).strip().title()
+        error = category_error(value)
+        if error:
+            raise ValueError(f"{product.product_id}: {error}")
+    # Only replace values that differ so unchanged CSV text is kept as is.
+    if getattr(product, field) != value:
+        setattr(product, field, value)
+
+
+def _diff(planned):
+    diff = []
+    for product, changed in planned:
+        for field in FIELDS:
+            old = getattr(product, field)
+            new = getattr(changed, field)
+            if old != new:
+                diff.append({"product_id": product.product_id, "field": field, "old": old, "new": new})
+    return diff
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from inventory_metrics import count
+
+MAX_ENTRIES = 128
+MAX_BYTES = int(os.environ.get("INVENTORY_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+def estimate_size(value, _seen=None):
+    """Rough deep size of value in bytes, counting shared objects once."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int) and getattr(value, "base", None) is not None:
+        # a NumPy view does not count the buffer it points into
+        size += nbytes
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _seen)
+    return size
+
+
+class ResultCache:
+    """LRU cache of computed results, bounded by entry count and total size.
+
+    Each entry remembers the catalog version it was computed from; a
+    lookup with a newer version is a miss and replaces the entry.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, version, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("cache_hits")
+                return entry[1]
+            self.misses += 1
+            count("cache_misses")
+
+        value = compute()
+        size = estimate_size(value)
+
+        with self._lock:
+            self._discard(key)
+            if size <= self.max_bytes:
+                self._entries[key] = (version, value, size)
+                self.bytes += size
+                while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                    self._discard(next(iter(self._entries)))
+                    self.evictions += 1
+        return value
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+result_cache = ResultCache()
+
+
+def cached(store, operation, args, compute):
+    """compute(), or its result from the last call with the same catalog version."""
+    key = (operation, os.path.abspath(store.file_path), args)
+    return result_cache.get_or_compute(key, store.version, compute)
@@ -0,0 +1,342 @@
+"""Command line for the inventory operations, one command or a whole batch.
+
+    python inventory_cli.py search mug
+    python inventory_cli.py list --category books --sort price
+    python inventory_cli.py list --sort value --desc --limit 50 --after '[812.5, "P94474"]'
+    python inventory_cli.py top highest-value -n 20
+    python inventory_cli.py update P94474 --price 45 --quantity 10
+    python inventory_cli.py discount electronics 10
+    python inventory_cli.py export exported_inventory --format jsonl.gz --stock "low stock"
+    python inventory_cli.py forecast --months 3
+    python inventory_cli.py trend value.png --from 2025-03-01 --points 1000
+    python inventory_cli.py batch commands.txt
+
+A batch file (or stdin, for "-" or no file) holds one command per line in
+the same syntax, with # comments. The whole file is parsed before anything
+runs, then every command runs against one loaded store and their changes
+are saved in a single commit at the end. If any command fails, nothing is
+written. --json prints each command's result as one line of JSON.
+
+list --limit prints one page and, on stderr, the cursor to pass as --after
+for the next one (in JSON the page is {"products": [...], "next": cursor}).
+"""
+import argparse
+import json
+import shlex
+import sys
+from datetime import datetime
+
+from inventory_actions import (ActionError, RANKINGS, SORT_FIELDS, create_product, discount_category,
+                               edit_product, export_products, find_products, forecast_demand, list_products,
+                               page_products, report_totals, top_products)
+from inventory_history import ValueHistory, history_path
+from inventory_import import import_file
+from inventory_metrics import registry, span
+from inventory_pager import format_product, write_lines
+from inventory_store import get_store
+from inventory_trend import TREND_POINTS, render_trend
+
+STOCK_STATUSES = ("in stock", "low stock", "out of stock")
+
+# Commands that write; they run inside store.transact().
+WRITES = ("add", "update", "discount")
+
+
+class CommandError(Exception):
+    """A command line that cannot be parsed."""
+
+
+class _Parser(argparse.ArgumentParser):
+    # Batch lines report a bad command instead of exiting the process.
+    def error(self, message):
+        raise CommandError(message)
+
+
+def _filter_options(parser):
+    parser.add_argument("--category")
+    parser.add_argument("--min-price", type=float)
+    parser.add_argument("--max-price", type=float)
+    parser.add_argument("--stock", choices=STOCK_STATUSES, help="stock status")
+
+
+def _cursor(text):
+    try:
+        value, product_id = json.loads(text)
+    except (ValueError, TypeError):
+        raise argparse.ArgumentTypeError(f"not a page cursor: {text}") from None
+    return value, product_id
+
+
+def _date(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {text}") from None
+
+
+def _positive(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {text}")
+    return value
+
+
+def build_parser(batch=False):
+    """The command line parser.
+
+    For batch lines it has no global options, no import (which commits
+    chunk by chunk) and no nested batch.
+    """
+    parser = _Parser(
+        prog="inventory_cli.py" if not batch else "batch",
+        description=__doc__.splitlines()[0],
+    )
+    if not batch:
+        parser.add_argument("--file", default="inventory.csv", help="inventory to work on")
+        parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+        parser.add_argument("--profile", metavar="FILE", help="write per-operation metrics to FILE at exit")
+        parser.add_argument("--profile-operation", metavar="NAME", help="also cProfile operation NAME")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("search", help="products whose ID or name contains TEXT")
+    command.add_argument("text")
+
+    command = commands.add_parser("list", help="products matching filters, optionally sorted")
+    _filter_options(command)
+    command.add_argument("--sort", choices=SORT_FIELDS)
+    command.add_argument("--desc", action="store_true", help="sort from high to low")
+    command.add_argument("--limit", type=_positive, help="print at most LIMIT products and the cursor for the rest")
+    command.add_argument("--after", type=_cursor, help="cursor printed with the previous page")
+
+    command = commands.add_parser("top", help="the first N products of a ranking")
+    command.add_argument("ranking", choices=RANKINGS)
+    command.add_argument("-n", type=_positive, default=10)
+    _filter_options(command)
+
+    command = commands.add_parser("add", help="add a product")
+    command.add_argument("product_id")
+    command.add_argument("name")
+    command.add_argument("category")
+    command.add_argument("price", type=float)
+    command.add_argument("quantity", type=int)
+
+    command = commands.add_parser("update", help="change fields of a product")
+    command.add_argument("product_id")
+    command.add_argument("--name")
+    command.add_argument("--category")
+    command.add_argument("--price", type=float)
+    command.add_argument("--quantity", type=int)
+
+    command = commands.add_parser("discount", help="take PERCENT off every product in CATEGORY")
+    command.add_argument("category")
+    command.add_argument("percent", type=float)
+    command.add_argument("--dry-run", action="store_true", help="show the new prices without saving them")
+
+    commands.add_parser("report", help="totals by category")
+
+    command = commands.add_parser("export", help="write products to PATH.<format>")
+    command.add_argument("path", help="output path without extension")
+    command.add_argument("--format", default="csv", help="csv, json or jsonl, optionally .gz or .xz")
+    command.add_argument("--fields", help="comma-separated fields to include")
+    command.add_argument("--category")
+    command.add_argument("--stock", choices=STOCK_STATUSES, help="stock status")
+
+    command = commands.add_parser("forecast", help="forecast demand for every product")
+    command.add_argument("--months", type=_positive, default=1)
+
+    command = commands.add_parser("trend", help="chart the logged inventory values to a .png or .svg file")
+    command.add_argument("output")
+    command.add_argument("--from", dest="start", type=_date, help="first day (default: the first logged value)")
+    command.add_argument("--to", dest="end", type=_date, help="last day, included (default: today)")
+    command.add_argument("--points", type=int, default=TREND_POINTS, help="plot at most about this many points")
+
+    if not batch:
+        command = commands.add_parser("import", help="merge a CSV of products into the inventory")
+        command.add_argument("path")
+
+        command = commands.add_parser("batch", help="run the commands in a file, or stdin, in one commit")
+        command.add_argument("script", nargs="?", default="-")
+    return parser
+
+
+def run_command(store, args):
+    """Run one parsed command against store and return its result; writes are only staged."""
+    with span(f"cli.{args.command}"):
+        if args.command == "search":
+            return find_products(store, args.text)
+        if args.command == "list":
+            filters = dict(category=args.category, min_price=args.min_price, max_price=args.max_price,
+                           stock_status=args.stock, order_by=args.sort, reverse=args.desc)
+            if args.limit is None:
+                if args.after is not None:
+                    raise CommandError("--after needs --limit")
+                return list_products(store, **filters)
+            products, cursor = page_products(store, args.limit, args.after, **filters)
+            return {"products": products, "next": cursor}
+        if args.command == "top":
+            return top_products(store, args.ranking, args.n, category=args.category, min_price=args.min_price,
+                                max_price=args.max_price, stock_status=args.stock)
+        if args.command == "add":
+            return create_product(store, args.product_id, args.name, args.category, args.price, args.quantity)
+        if args.command == "update":
+            return edit_product(store, args.product_id, args.name, args.category, args.price, args.quantity)
+        if args.command == "discount":
+            return discount_category(store, args.category, args.percent, dry_run=args.dry_run)
+        if args.command == "report":
+            products, quantity, value, categories = report_totals(store)
+            return {"products": products, "quantity": quantity, "value": value, "categories": categories}
+        if args.command == "export":
+            fields = [field.strip() for field in args.fields.split(",")] if args.fields else None
+            exported, path = export_products(
+                store, args.path, args.format, fields, category=args.category, stock_status=args.stock
+            )
+            return {"exported": exported, "path": path}
+        if args.command == "forecast":
+            return list(forecast_demand(store, args.months).rows())
+        if args.command == "trend":
+            end = args.end.replace(hour=23, minute=59, second=59) if args.end else datetime.now()
+            timestamps, values = ValueHistory(history_path(store.file_path)).arrays(args.start, end)
+            if not values:
+                raise ActionError("No inventory value data available.")
+            try:
+                plotted = render_trend(timestamps, values, args.output, args.points)
+            except ValueError as e:
+                raise ActionError(str(e)) from None
+            return {"values": len(values), "plotted": plotted, "path": args.output}
+        raise CommandError(f"{args.command} cannot run here")
+
+
+def format_result(args, result, as_json=False):
+    """Lines to print for result of the command in args; a generator, so long listings stream."""
+    if as_json:
+        if isinstance(result, list) and result and hasattr(result[0], "to_row"):
+            result = [product.to_row() for product in result]
+        elif hasattr(result, "to_row"):
+            result = result.to_row()
+        elif isinstance(result, dict) and "next" in result:
+            result = {"products": [product.to_row() for product in result["products"]], "next": result["next"]}
+        yield json.dumps(result)
+        return
+    if args.command == "list" and isinstance(result, dict):
+        result = result["products"]
+    if args.command in ("search", "list", "top"):
+        yield from (format_product(product) for product in result)
+        return
+    if args.command in ("add", "update"):
+        yield format_product(result)
+        return
+    yield from _summary_lines(args, result)
+
+
+def _summary_lines(args, result):
+    if args.command == "discount":
+        verb = "Would discount" if args.dry_run else "Discounted"
+        lines = [f"{verb} {len(result)} products in '{args.category}' by {args.percent}%"]
+        return lines + [f"{row['product_id']} | {row['name']} | R{row['old_price']} -> R{row['new_price']}" for row in result]
+    if args.command == "report":
+        lines = [
+            f"Total number of products: {result['products']}",
+            f"Total quantity: {result['quantity']}",
+            f"Total inventory amount: R{result['value']:,.2f}",
+        ]
+        return lines + [f"  {category}: {count} product(s)" for category, count in result["categories"].items()]
+    if args.command == "export":
+        return [f"Exported {result['exported']} products to '{result['path']}'."]
+    if args.command == "trend":
+        return [f"Saved the trend of {result['values']:,} values ({result['plotted']:,} plotted) to '{result['path']}'."]
+    if args.command == "forecast":
+        return [
+            f"{row['product_id']:<12}{row['name']:<25}{row['stock']:<15}{row['forecast_demand']:<20}{row['status']}"
+            for row in result
+        ]
+    if args.command == "import":
+        return [
+            f"Imported: {result['imported']} new products",
+            f"Updated: {result['updated']} current products",
+            f"Invalid rows skipped: {result['invalid']}",
+        ]
+    return [str(result)]
+
+
+def parse_script(lines):
+    """[(line number, parsed command)] for a batch script; raises CommandError naming the bad line."""
+    parser = build_parser(batch=True)
+    commands = []
+    for number, line in enumerate(lines, 1):
+        try:
+            words = shlex.split(line, comments=True)
+            if not words:
+                continue
+            commands.append((number, parser.parse_args(words)))
+        except (CommandError, ValueError) as e:
+            raise CommandError(f"line {number}: {e}") from None
+    return commands
+
+
+def run_batch(store, commands):
+    """Run parsed commands in one transaction; returns [(args, result)].
+
+    Runs again from the top if another process writes first, so results
+    are only returned once the commit has gone through.
+    """
+    def run_all(store):
+        results = []
+        for number, args in commands:
+            try:
+                results.append((args, run_command(store, args)))
+            except ActionError as e:
+                raise ActionError(f"line {number}: {e}") from None
+        return results
+
+    with span("cli.batch"):
+        return store.transact(run_all)
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except CommandError as e:
+        parser.print_usage(sys.stderr)
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 2
+    if args.profile:
+        registry.enable(args.profile, args.profile_operation)
+
+    store = get_store(args.file)
+    try:
+        if args.command == "batch":
+            if args.script == "-":
+                commands = parse_script(sys.stdin)
+            else:
+                with open(args.script) as script:
+                    commands = parse_script(script)
+            results = run_batch(store, commands)
+        elif args.command == "import":
+            results = [(args, import_file(args.path, args.file))]
+        elif args.command in WRITES and not getattr(args, "dry_run", False):
+            results = [(args, store.transact(lambda store: run_command(store, args)))]
+        else:
+            results = [(args, run_command(store, args))]
+    except CommandError as e:
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 2
+    except (ActionError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for command_args, result in results:
+        if not write_lines(format_result(command_args, result, args.json)):
+            break
+        if command_args.command == "list" and isinstance(result, dict) and not args.json:
+            next_page = json.dumps(result["next"]) if result["next"] is not None else "none"
+            print(f"next: {next_page}", file=sys.stderr)
+    store.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
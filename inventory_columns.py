@@ -0,0 +1,99 @@
+# NumPy is imported on first use so that starting the menu never pays for it.
+np = None
+_numpy_missing = False
+
+
+def have_numpy():
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+        else:
+            np = numpy
+    return np is not None
+
+
+class ColumnarInventory:
+    """The numeric columns of the catalog as NumPy arrays.
+
+    price, quantity and monthly_sales are stored as arrays and category as
+    integer codes into self.categories, so totals and per-category figures
+    are vectorized sums instead of a Python loop over every row.
+    """
+
+    def __init__(self, products):
+        products = list(products)
+        count = len(products)
+        self.positions = {}
+        self.categories = []
+        self._codes = {}
+        self.price = np.fromiter((product.price for product in products), dtype=np.float64, count=count)
+        self.quantity = np.fromiter((product.quantity for product in products), dtype=np.int64, count=count)
+        self.monthly_sales = np.fromiter((product.monthly_sales for product in products), dtype=np.int64, count=count)
+        self.category = np.fromiter((self._code(product.category) for product in products), dtype=np.int64, count=count)
+        for position, product in enumerate(products):
+            self.positions[product.product_id] = position
+
+    def _code(self, category):
+        code = self._codes.get(category)
+        if code is None:
+            code = self._codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def __len__(self):
+        return len(self.price)
+
+    def update(self, product):
+        """Overwrite an existing product in place; False if it needs a rebuild."""
+        if self.positions is None:
+            return False
+        position = self.positions.get(product.product_id)
+        if position is None or product.category not in self._codes:
+            return False
+        self.price[position] = product.price
+        self.quantity[position] = product.quantity
+        self.monthly_sales[position] = product.monthly_sales
+        self.category[position] = self._codes[product.category]
+        return True
+
+    def total_quantity(self):
+        return int(self.quantity.sum())
+
+    def total_value(self):
+        return float(np.dot(self.price, self.quantity))
+
+    def category_counts(self):
+        """{category: (product count, stock value)} in order of first appearance."""
+        if not len(self):
+            return {}
+        counts = np.bincount(self.category, minlength=len(self.categories))
+        values = np.bincount(self.category, weights=self.price * self.quantity, minlength=len(self.categories))
+        codes, first = np.unique(self.category, return_index=True)
+        return {
+            self.categories[code]: (int(counts[code]), float(values[code]))
+            for code in codes[np.argsort(first)]
+        }
+
+
+def build_columns(products):
+    if not have_numpy():
+        return None
+    return ColumnarInventory(products)
+
+
+def columns_from_snapshot(snapshot):
+    """Columns copied straight out of a mapped snapshot, with no per-row work."""
+    if not have_numpy():
+        return None
+    columns = ColumnarInventory.__new__(ColumnarInventory)
+    columns.positions = None
+    columns.categories = list(snapshot.categories)
+    columns._codes = {category: code for code, category in enumerate(columns.categories)}
+    columns.price = np.frombuffer(snapshot.column("price"), dtype=np.float64).copy()
+    columns.quantity = np.frombuffer(snapshot.column("quantity"), dtype=np.int64).copy()
+    columns.monthly_sales = np.frombuffer(snapshot.column("monthly_sales"), dtype=np.int64).copy()
+    columns.category = np.frombuffer(snapshot.column("category"), dtype=np.int32).astype(np.int64)
+    return columns
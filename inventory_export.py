@@ -0,0 +1,79 @@
+import csv
+import gzip
+import json
+import lzma
+import os
+
+from inventory_metrics import count
+
+FORMATS = ("csv", "json", "jsonl")
+
+COMPRESSORS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def split_format(export_format):
+    """("json", ".gz") for "json.gz"; the compression suffix is optional."""
+    base, dot, suffix = export_format.partition(".")
+    suffix = dot + suffix
+    if base not in FORMATS or (suffix and suffix not in COMPRESSORS):
+        return None, None
+    return base, suffix
+
+
+def open_export(path):
+    """Open path for text writing, compressed according to its extension."""
+    for suffix, opener in COMPRESSORS.items():
+        if path.endswith(suffix):
+            return opener(path, mode="wt", newline="")
+    return open(path, mode="w", newline="")
+
+
+def write_csv(rows, file, fieldnames):
+    writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_json(rows, file):
+    # Same bytes as json.dump(rows, file, indent=2), one row at a time.
+    count = 0
+    for row in rows:
+        file.write("[\n" if count == 0 else ",\n")
+        file.write("  " + json.dumps(row, indent=2).replace("\n", "\n  "))
+        count += 1
+    file.write("\n]" if count else "[]")
+    return count
+
+
+def write_jsonl(rows, file):
+    count = 0
+    for row in rows:
+        file.write(json.dumps(row))
+        file.write("\n")
+        count += 1
+    return count
+
+
+def write_rows(rows, file, export_format, fieldnames):
+    if export_format == "csv":
+        return write_csv(rows, file, fieldnames)
+    if export_format == "json":
+        return write_json(rows, file)
+    return write_jsonl(rows, file)
+
+
+def export_rows(rows, path, export_format, fieldnames):
+    """Stream rows to path in export_format and return how many were written."""
+    with open_export(path) as file:
+        exported = write_rows(rows, file, export_format, fieldnames)
+    count("rows_written", exported)
+    count("bytes_written", os.path.getsize(path))
+    return exported
@@ -0,0 +1,141 @@
+import math
+from datetime import datetime
+
+import inventory_columns
+from inventory_columns import have_numpy
+
+SEASONAL_EFFECTS = {
+    12: 1.4,
+    11: 1.2,
+    1: 0.85
+}
+
+SMOOTHING_ALPHA = 0.3
+
+
+def seasonal_multiplier(month):
+    return SEASONAL_EFFECTS.get(month, 1.0)
+
+
+def horizon_months(months, start=None):
+    """[(year, month)] for the next `months` months, starting with start's month."""
+    start = start or datetime.now()
+    horizon = []
+    for offset in range(months):
+        year, month = divmod(start.month - 1 + offset, 12)
+        horizon.append((start.year + year, month + 1))
+    return horizon
+
+
+def smoothed_demand(history, alpha=SMOOTHING_ALPHA):
+    """Exponentially smoothed monthly demand from a list of monthly sales, oldest first."""
+    level = None
+    for sales in history:
+        level = sales if level is None else alpha * sales + (1 - alpha) * level
+    return level
+
+
+def _floor(value):
+    # round first so 1.4 + 1.4 + 1.4 counts as 4.2 and not 4.1999...
+    return math.floor(round(value, 9))
+
+
+class ForecastResult:
+    """Demand, deficit and restock quantities for every product and horizon.
+
+    demand, deficit and restock are products x months matrices (NumPy
+    arrays, or lists of lists without NumPy); column h is the cumulative
+    figure for the first h + 1 months of the horizon.
+    """
+
+    def __init__(self, product_ids, names, stock, months, multipliers, demand):
+        self.product_ids = product_ids
+        self.names = names
+        self.stock = stock
+        self.months = months
+        self.multipliers = multipliers
+        self.demand = demand
+        if isinstance(demand, list):
+            self.deficit = [[value - units for value in row] for row, units in zip(demand, stock)]
+            self.restock = [[max(value, 0) for value in row] for row in self.deficit]
+        else:
+            np = inventory_columns.np
+            self.deficit = demand - stock[:, None]
+            self.restock = np.maximum(self.deficit, 0)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def rows(self, horizon=None):
+        """One dict per product for the cumulative forecast through `horizon` months."""
+        column = (horizon or len(self.months)) - 1
+        for i, product_id in enumerate(self.product_ids):
+            deficit = int(self.deficit[i][column])
+            yield {
+                "product_id": product_id,
+                "name": self.names[i],
+                "stock": int(self.stock[i]),
+                "forecast_demand": int(self.demand[i][column]),
+                "deficit": deficit,
+                "restock": max(deficit, 0),
+                "status": "Still good" if deficit <= 0 else f"Time to restock {deficit}",
+            }
+
+
+def forecast(products, months=1, start=None, history=None, alpha=SMOOTHING_ALPHA):
+    """Forecast demand for products over the next 1..months months.
+
+    Each month of the horizon gets its own seasonal multiplier. The monthly
+    base demand is the product's monthly_sales, or the exponentially
+    smoothed sales when history ({product_id: [monthly sales, oldest
+    first]}) has an entry for it.
+    """
+    if months < 1:
+        raise ValueError("Forecast at least one month ahead.")
+    products = list(products)
+    horizon = horizon_months(months, start)
+    multipliers = [seasonal_multiplier(month) for _, month in horizon]
+    product_ids = [product.product_id for product in products]
+    names = [product.name or "Unknown" for product in products]
+    history = history or {}
+
+    if not have_numpy():
+        cumulative = []
+        total = 0.0
+        for multiplier in multipliers:
+            total += multiplier
+            cumulative.append(total)
+        demand = []
+        for product in products:
+            sales = history.get(product.product_id)
+            base = smoothed_demand(sales, alpha) if sales else product.monthly_sales
+            demand.append([_floor(base * factor) for factor in cumulative])
+        stock = [product.quantity for product in products]
+        return ForecastResult(product_ids, names, stock, horizon, multipliers, demand)
+
+    np = inventory_columns.np
+    count = len(products)
+    stock = np.fromiter((product.quantity for product in products), dtype=np.int64, count=count)
+    base = np.fromiter((product.monthly_sales for product in products), dtype=np.float64, count=count)
+    if history:
+        smoothed = _smoothed_columns(np, product_ids, history, alpha)
+        base = np.where(np.isnan(smoothed), base, smoothed)
+    cumulative = np.cumsum(np.array(multipliers, dtype=np.float64))
+    demand = np.floor(np.round(np.outer(base, cumulative), 9)).astype(np.int64)
+    return ForecastResult(product_ids, names, stock, horizon, multipliers, demand)
+
+
+def _smoothed_columns(np, product_ids, history, alpha):
+    # Histories can differ in length, so they are right-aligned in one
+    # matrix padded with NaN and smoothed a month (column) at a time.
+    width = max((len(sales) for sales in history.values()), default=0)
+    matrix = np.full((len(product_ids), width), np.nan)
+    for i, product_id in enumerate(product_ids):
+        sales = history.get(product_id)
+        if sales:
+            matrix[i, width - len(sales):] = sales
+    level = np.full(len(product_ids), np.nan)
+    for column in matrix.T:
+        smoothed = alpha * column + (1 - alpha) * level
+        level = np.where(np.isnan(level), column, np.where(np.isnan(column), level, smoothed))
+    return level
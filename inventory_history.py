@@ -0,0 +1,114 @@
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# One record per logged value: (POSIX timestamp, inventory value).
+RECORD = struct.Struct("<dd")
+
+
+def history_path(file_path):
+    return file_path + ".history"
+
+
+class ValueHistory:
+    """Inventory value snapshots in an append-only file of fixed-size records.
+
+    The timestamps are kept sorted in memory, so a date range is found with
+    two bisects instead of a scan. Records appended by another process are
+    picked up on the next read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._timestamps = array("d")
+        self._values = array("d")
+        self._read_bytes = 0
+
+    def _refresh(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size < self._read_bytes:
+            # the file was replaced or truncated; start over
+            self._timestamps = array("d")
+            self._values = array("d")
+            self._read_bytes = 0
+        # A torn final record from a crash mid-append is ignored.
+        end = size - size % RECORD.size
+        if end <= self._read_bytes:
+            return
+        with open(self.path, mode="rb") as f:
+            f.seek(self._read_bytes)
+            data = f.read(end - self._read_bytes)
+        self._extend(data)
+        self._read_bytes = end
+
+    def _extend(self, data):
+        records = array("d")
+        records.frombytes(data)
+        if sys.byteorder != "little":
+            records.byteswap()
+        timestamps = records[0::2]
+        # Records are nearly always appended in order, so whole runs of
+        # them are copied in at once; sorted() checks that in linear time.
+        if (not self._timestamps or timestamps[0] >= self._timestamps[-1]) and \
+                timestamps.tolist() == sorted(timestamps):
+            self._timestamps.extend(timestamps)
+            self._values.extend(records[1::2])
+            return
+        for timestamp, value in RECORD.iter_unpack(data):
+            self._insert(timestamp, value)
+
+    def _insert(self, timestamp, value):
+        timestamps = self._timestamps
+        if not timestamps or timestamp >= timestamps[-1]:
+            timestamps.append(timestamp)
+            self._values.append(value)
+        else:
+            # the clock went backwards; keep the index sorted anyway
+            position = bisect_right(timestamps, timestamp)
+            timestamps.insert(position, timestamp)
+            self._values.insert(position, value)
+
+    def append(self, date, value):
+        with open(self.path, mode="ab") as f:
+            if f.tell() % RECORD.size:
+                f.truncate(f.tell() - f.tell() % RECORD.size)
+            f.write(RECORD.pack(date.timestamp(), value))
+            f.flush()
+            os.fsync(f.fileno())
+        # Reading back also picks up records other processes appended.
+        self._refresh()
+
+    def __len__(self):
+        self._refresh()
+        return len(self._timestamps)
+
+    def _entries(self, start, stop):
+        return [
+            {"date": datetime.fromtimestamp(self._timestamps[i]), "value": self._values[i]}
+            for i in range(start, stop)
+        ]
+
+    def entries(self):
+        self._refresh()
+        return self._entries(0, len(self._timestamps))
+
+    def _range(self, start_date, end_date):
+        self._refresh()
+        start = bisect_left(self._timestamps, start_date.timestamp()) if start_date else 0
+        stop = bisect_right(self._timestamps, end_date.timestamp()) if end_date else len(self._timestamps)
+        return start, stop
+
+    def between(self, start_date, end_date):
+        """Entries with start_date <= date <= end_date, oldest first."""
+        return self._entries(*self._range(start_date, end_date))
+
+    def arrays(self, start_date=None, end_date=None):
+        """(timestamps, values) arrays for the same range as between(); None leaves that end open."""
+        start, stop = self._range(start_date, end_date)
+        return self._timestamps[start:stop], self._values[start:stop]
@@ -0,0 +1,101 @@
+import csv
+import os
+import time
+from collections import deque
+
+from inventory_metrics import count
+from inventory_product import validate_row
+from inventory_store import get_store
+
+CHUNK_SIZE = 10000
+
+# Below this size the process pool costs more than it saves.
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, mode="r", newline="") as f:
+        reader = csv.DictReader(f)
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def validate_chunk(rows):
+    return [validate_row(row) for row in rows]
+
+
+def _validated_chunks(path, chunk_size, workers):
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(path) >= PARALLEL_MIN_BYTES else 1
+    if workers <= 1:
+        for rows in read_chunks(path, chunk_size):
+            yield len(rows), validate_chunk(rows)
+        return
+
+    # multiprocessing is slow to import, so only small imports skip it.
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Keep at most two chunks per worker in flight so memory stays bounded
+    # by the chunk size, not by the size of the import file.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for rows in read_chunks(path, chunk_size):
+            in_flight.append((len(rows), pool.submit(validate_chunk, rows)))
+            if len(in_flight) >= workers * 2:
+                size, future = in_flight.popleft()
+                yield size, future.result()
+        while in_flight:
+            size, future = in_flight.popleft()
+            yield size, future.result()
+
+
+def import_file(path_import, file_path="inventory.csv", chunk_size=CHUNK_SIZE, workers=None):
+    """Merge a CSV of products into the inventory one chunk at a time.
+
+    Chunks are validated on a process pool for large files and each merged
+    chunk is appended to the journal before the next one is read. Returns
+    a dict of imported, updated and invalid counts plus rows per second.
+    """
+    start = time.perf_counter()
+    store = get_store(file_path)
+    store.refresh()
+    count("bytes_read", os.path.getsize(path_import))
+
+    imported = 0
+    updated = 0
+    invalid = 0
+    rows = 0
+
+    for size, products in _validated_chunks(path_import, chunk_size, workers):
+        rows += size
+        count("rows_read", size)
+        valid = {}
+        for product in products:
+            if product is None:
+                invalid += 1
+                continue
+            if product.product_id in valid:
+                updated += 1
+            valid[product.product_id] = product
+        # Another import writing at the same time makes this chunk retry.
+        added = store.transact(lambda store: store.put_many(valid.values()), compact=False)
+        imported += added
+        updated += len(valid) - added
+
+    store.compact()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "imported": imported,
+        "updated": updated,
+        "invalid": invalid,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+    }
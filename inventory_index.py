@@ -0,0 +1,218 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Substring search over product_id and name.
+
+    Queries of three or more characters intersect the trigram posting lists
+    and only check the surviving candidates. Shorter queries fall back to a
+    sorted prefix index over the product_id, the name and each word of the
+    name.
+    """
+
+    def __init__(self, fields=("product_id", "name")):
+        self.fields = fields
+        self._postings = {}
+        self._keys = {}
+        self._order = {}
+        self._prefixes = []
+        self._next = 0
+
+    def build(self, products):
+        postings = self._postings
+        for product in products:
+            product_id = product.product_id
+            keys = self._row_keys(product)
+            if product_id in self._keys:
+                self.add(product)
+                continue
+            self._keys[product_id] = keys
+            self._order[product_id] = self._next
+            self._next += 1
+            for gram in set().union(*map(trigrams, keys)):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = {product_id}
+                else:
+                    posting.add(product_id)
+            self._prefixes.extend((key, product_id) for key in self._prefix_keys(keys))
+        self._prefixes.sort()
+        return self
+
+    def _row_keys(self, product):
+        return tuple(getattr(product, field).lower() for field in self.fields)
+
+    def _prefix_keys(self, keys):
+        words = set(keys)
+        for key in keys:
+            words.update(key.split())
+        return words
+
+    def add(self, product):
+        product_id = product.product_id
+        keys = self._row_keys(product)
+        if self._keys.get(product_id) == keys:
+            return
+        if product_id in self._keys:
+            self.remove(product_id)
+        else:
+            self._order[product_id] = self._next
+            self._next += 1
+        self._keys[product_id] = keys
+        for gram in set().union(*map(trigrams, keys)):
+            self._postings.setdefault(gram, set()).add(product_id)
+        for key in self._prefix_keys(keys):
+            insort(self._prefixes, (key, product_id))
+
+    def remove(self, product_id):
+        keys = self._keys.pop(product_id, None)
+        if keys is None:
+            return
+        for gram in set().union(*map(trigrams, keys)):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self._postings[gram]
+        for key in self._prefix_keys(keys):
+            i = bisect_left(self._prefixes, (key, product_id))
+            if i < len(self._prefixes) and self._prefixes[i] == (key, product_id):
+                del self._prefixes[i]
+
+    def search(self, query):
+        """Return matching product ids in the order they were first added."""
+        query = query.lower()
+        if not query:
+            matches = self._keys.keys()
+        elif len(query) < 3:
+            matches = set()
+            i = bisect_left(self._prefixes, (query,))
+            while i < len(self._prefixes) and self._prefixes[i][0].startswith(query):
+                matches.add(self._prefixes[i][1])
+                i += 1
+        else:
+            postings = []
+            for gram in trigrams(query):
+                posting = self._postings.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+            matches = [
+                product_id for product_id in candidates
+                if any(query in key for key in self._keys[product_id])
+            ]
+        return sorted(matches, key=self._order.__getitem__)
+
+
+SORT_KEYS = {
+    "name": lambda product: product.name.lower(),
+    "price": lambda product: product.price,
+    "quantity": lambda product: product.quantity,
+    "value": lambda product: product.price * product.quantity,
+}
+
+
+class SortedIndex:
+    """Product ids kept in order of one field, for range slices and sorted walks.
+
+    Entries are (value, order, product_id) where order is the position the
+    product was first seen at, so ties come out in catalog order just like a
+    stable sort would.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.key = SORT_KEYS[field]
+        self._entries = []
+        self._values = {}
+        self._order = {}
+        self._next = 0
+
+    def _entry(self, product):
+        product_id = product.product_id
+        order = self._order.get(product_id)
+        if order is None:
+            order = self._order[product_id] = self._next
+            self._next += 1
+        return (self.key(product), order, product_id)
+
+    def build(self, products):
+        for product in products:
+            if product.product_id in self._order:
+                self.add(product)
+                continue
+            entry = self._entry(product)
+            self._entries.append(entry)
+            self._values[entry[2]] = entry
+        self._entries.sort()
+        return self
+
+    def add(self, product):
+        entry = self._entry(product)
+        old = self._values.get(product.product_id)
+        if old == entry:
+            return
+        if old is not None:
+            self.remove(product.product_id)
+        insort(self._entries, entry)
+        self._values[entry[2]] = entry
+
+    def remove(self, product_id):
+        entry = self._values.pop(product_id, None)
+        if entry is None:
+            return
+        i = bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+
+    def __iter__(self):
+        return (entry[2] for entry in self._entries)
+
+    def __reversed__(self):
+        return (entry[2] for entry in reversed(self._entries))
+
+    def _bounds(self, low, high):
+        start = 0 if low is None else bisect_left(self._entries, (low,))
+        stop = len(self._entries) if high is None else bisect_right(self._entries, (high, float("inf")))
+        return start, stop
+
+    def range(self, low=None, high=None, catalog_order=False):
+        """Product ids with low <= value <= high, in value order or catalog order."""
+        start, stop = self._bounds(low, high)
+        entries = self._entries[start:stop]
+        if catalog_order:
+            entries.sort(key=lambda entry: entry[1])
+        return [entry[2] for entry in entries]
+
+    def page(self, after=None, limit=None, reverse=False):
+        """Product ids of up to limit entries following after, a (value, product_id) cursor.
+
+        If the cursor's product has left the index, the page starts past
+        every entry with the cursor's value.
+        """
+        entries = self._entries
+        if reverse:
+            if after is None:
+                stop = len(entries)
+            else:
+                order = self._order.get(after[1])
+                stop = bisect_left(entries, (after[0],) if order is None else (after[0], order))
+            start = 0 if limit is None else max(stop - limit, 0)
+            return [entry[2] for entry in reversed(entries[start:stop])]
+        if after is None:
+            start = 0
+        else:
+            order = self._order.get(after[1])
+            start = bisect_left(entries, (after[0], float("inf") if order is None else order + 1))
+        stop = len(entries) if limit is None else start + limit
+        return [entry[2] for entry in entries[start:stop]]
+
+    def count(self, low=None, high=None):
+        start, stop = self._bounds(low, high)
+        return max(stop - start, 0)
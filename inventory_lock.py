@@ -0,0 +1,96 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks on Windows; writers there only exclude each other
+    # within one process.
+    fcntl = None
+
+STATE_WIDTH = 20
+
+
+def lock_path(file_path):
+    return file_path + ".lock"
+
+
+class FileLock:
+    """An advisory fcntl lock on inventory.csv.lock, shared or exclusive.
+
+    Writers hold it exclusively around every change to the inventory files
+    and readers share it while they load them, so nobody reads a journal
+    halfway through an append or a CSV between its rename and the journal
+    trim. The lock file also holds the inventory's write version and its
+    compaction generation.
+
+    Nested acquisitions from the thread that holds the lock are free. Other
+    threads of the same process wait their turn, because flock() would let
+    every thread sharing the descriptor straight through.
+    """
+
+    def __init__(self, file_path):
+        self.path = lock_path(file_path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, shared=False):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                if self._fd is None:
+                    try:
+                        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+                    except OSError:
+                        # Readers of a read-only directory go without; writers
+                        # would fail on the inventory files anyway.
+                        if not shared:
+                            raise
+                if self._fd is not None and fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    @contextmanager
+    def shared(self):
+        self.acquire(shared=True)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @contextmanager
+    def exclusive(self):
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def state(self):
+        """(write version, compaction generation); (0, 0) before the first write."""
+        if self._fd is None:
+            return 0, 0
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        data = os.read(self._fd, 2 * STATE_WIDTH + 2).split()
+        try:
+            return int(data[0]), int(data[1])
+        except (IndexError, ValueError):
+            return 0, 0
+
+    def set_state(self, version, generation):
+        """Overwrite the stored state; only call with the lock held exclusively."""
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        # Not fsynced: the state only has to outlive the processes that read
+        # it, and a power loss takes those down with it.
+        os.write(self._fd, b"%0*d %0*d\n" % (STATE_WIDTH, version, STATE_WIDTH, generation))
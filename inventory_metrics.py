@@ -0,0 +1,233 @@
+"""Per-operation metrics for the inventory menu actions.
+
+Off unless INVENTORY_PROFILE names the file to write them to (or the menu
+is started with --profile FILE). While on, every menu action and the
+store work under it (CSV load, journal writes, index builds, compaction)
+records its wall time, rows and bytes read and written, and result cache
+hits; the totals are written at exit as JSON, or as Prometheus text when
+the file name ends in .prom or .txt.
+
+INVENTORY_PROFILE_OPERATION=<name> additionally runs that one operation
+under cProfile and writes the accumulated stats next to the metrics file,
+with a .pstats extension (read them with python -m pstats).
+
+While off, a wrapped operation costs one attribute check per call.
+"""
+import atexit
+import builtins
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+COUNTERS = ("rows_read", "rows_written", "bytes_read", "bytes_written", "cache_hits", "cache_misses")
+
+PROMETHEUS_SUFFIXES = (".prom", ".txt")
+
+_NULL = nullcontext()
+
+
+def _new_stats():
+    stats = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "input_seconds": 0.0}
+    stats.update((counter, 0) for counter in COUNTERS)
+    return stats
+
+
+class Metrics:
+    """In-process registry of per-operation timings and counters.
+
+    Operations nest: counts made while several are running go to each of
+    them, so a menu action includes the loads and writes it caused. Time
+    spent waiting in input() is kept apart from the operation's seconds.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.profile_operation = None
+        self.operations = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler = None
+        self._profiling = False
+        self._input = None
+        self._registered = False
+
+    def enable(self, path=None, profile_operation=None):
+        self.path = path
+        self.profile_operation = profile_operation
+        if self._input is None:
+            self._input = builtins.input
+            builtins.input = self._timed_input
+        self.enabled = True
+        if path and not self._registered:
+            atexit.register(self._dump_at_exit)
+            self._registered = True
+
+    def disable(self):
+        self.enabled = False
+        if self._input is not None:
+            builtins.input = self._input
+            self._input = None
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self._profiler = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.input_seconds = 0.0
+        return stack
+
+    def _timed_input(self, prompt=""):
+        start = time.perf_counter()
+        try:
+            return self._input(prompt)
+        finally:
+            self._stack()
+            self._local.input_seconds += time.perf_counter() - start
+
+    def span(self, name):
+        """Context manager timing name; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NULL
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        stack = self._stack()
+        stack.append(name)
+        waited = self._local.input_seconds
+        profiler = self._start_profile(name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            stack.pop()
+            waited = self._local.input_seconds - waited
+            with self._lock:
+                stats = self.operations.get(name)
+                if stats is None:
+                    stats = self.operations[name] = _new_stats()
+                stats["calls"] += 1
+                stats["errors"] += failed
+                stats["seconds"] += elapsed - waited
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed - waited)
+                stats["input_seconds"] += waited
+
+    def _start_profile(self, name):
+        if name != self.profile_operation:
+            return None
+        with self._lock:
+            # cProfile sees one thread at a time, so concurrent runs go unprofiled.
+            if self._profiling:
+                return None
+            self._profiling = True
+            if self._profiler is None:
+                import cProfile
+
+                self._profiler = cProfile.Profile()
+            profiler = self._profiler
+        profiler.enable()
+        return profiler
+
+    def count(self, counter, amount=1):
+        """Add amount to counter for every operation running in this thread."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        with self._lock:
+            for name in set(stack) if stack else ("background",):
+                stats = self.operations.get(name)
+                if stats is None:
+                    stats = self.operations[name] = _new_stats()
+                stats[counter] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in sorted(self.operations.items())}
+
+    def to_json(self):
+        from inventory_cache import result_cache
+
+        return json.dumps({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "operations": self.snapshot(),
+            "result_cache": result_cache.stats(),
+        }, indent=2)
+
+    def to_prometheus(self):
+        operations = self.snapshot()
+        metrics = [
+            ("calls", "counter", "Times the operation ran."),
+            ("errors", "counter", "Times the operation raised."),
+            ("seconds", "counter", "Wall time spent in the operation, without input() waits."),
+            ("max_seconds", "gauge", "Longest single run of the operation."),
+            ("input_seconds", "counter", "Time the operation spent waiting in input()."),
+        ] + [(counter, "counter", counter.replace("_", " ").capitalize() + ".") for counter in COUNTERS]
+        lines = []
+        for key, kind, description in metrics:
+            metric = f"inventory_operation_{key}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in operations.items():
+                lines.append(f'{metric}{{operation="{name}"}} {stats[key]!r}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None):
+        """Write the metrics to path (default: the enabled one) and any cProfile stats."""
+        path = path or self.path
+        text = self.to_prometheus() if path.endswith(PROMETHEUS_SUFFIXES) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+        if self._profiler is not None:
+            self._profiler.dump_stats(os.path.splitext(path)[0] + ".pstats")
+        return path
+
+    def _dump_at_exit(self):
+        if self.enabled and self.path:
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Could not write metrics to {self.path}: {e}")
+
+
+registry = Metrics()
+
+if os.environ.get("INVENTORY_PROFILE"):
+    registry.enable(os.environ["INVENTORY_PROFILE"], os.environ.get("INVENTORY_PROFILE_OPERATION"))
+
+
+def operation(name):
+    """Decorator recording each call of the function as operation name."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return function(*args, **kwargs)
+            with registry._span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def span(name):
+    return registry.span(name)
+
+
+def count(counter, amount=1):
+    registry.count(counter, amount)
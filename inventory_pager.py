@@ -0,0 +1,71 @@
+"""Screen-at-a-time output for long product listings.
+
+On a terminal a listing stops after each screenful until Enter is pressed
+(q stops it). Piped or redirected it streams straight through in large
+chunks, ready for less or head, and stops quietly when the reader goes
+away. Either way only the rows being written are ever formatted.
+INVENTORY_PAGE_SIZE sets the rows per screen; by default it follows the
+terminal height.
+"""
+import os
+import shutil
+import sys
+from itertools import islice
+
+# Rows formatted and written per chunk when nobody is reading along.
+STREAM_ROWS = 5000
+
+
+def format_product(product):
+    return f"{product['product_id']} | {product['name']} | {product['category']} | R{product['price']} | Qty: {product['quantity']}"
+
+
+def page_size():
+    size = int(os.environ.get("INVENTORY_PAGE_SIZE", 0))
+    return size or max(shutil.get_terminal_size().lines - 3, 5)
+
+
+def interactive():
+    return sys.stdin.isatty() and sys.stdout.isatty()
+
+
+def write_lines(lines):
+    """Write lines a chunk at a time; False once the reader has gone away."""
+    lines = iter(lines)
+    try:
+        while True:
+            chunk = list(islice(lines, STREAM_ROWS))
+            if not chunk:
+                return True
+            sys.stdout.write("\n".join(chunk) + "\n")
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # Python would hit the closed pipe again flushing stdout at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return False
+
+
+def list_pages(rows):
+    """fetch() for show_pages over a list already in memory; the cursor is an offset."""
+    def fetch(cursor, limit):
+        start = cursor or 0
+        stop = start + limit
+        return rows[start:stop], (stop if stop < len(rows) else None)
+    return fetch
+
+
+def show_pages(fetch, format_line=format_product):
+    """Write the rows fetch(cursor, limit) returns, one page at a time.
+
+    fetch returns (rows, cursor for the next page or None) and is first
+    called with cursor None.
+    """
+    prompting = interactive()
+    limit = page_size() if prompting else STREAM_ROWS
+    cursor = None
+    while True:
+        rows, cursor = fetch(cursor, limit)
+        if not write_lines(format_line(row) for row in rows) or cursor is None:
+            return
+        if prompting and input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+            return
@@ -0,0 +1,194 @@
+FIELDNAMES = ["product_id", "name", "category", "price", "quantity", "last_updated"]
+
+
+def parse_price(value):
+    return round(float(value), 2)
+
+
+def parse_count(value):
+    """value as an int; ValueError unless it is a whole number (True and 5.5 are not)."""
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"not a whole number: {value!r}")
+    return int(value)
+
+
+def _text(value, parsed):
+    # Only keep the original text when it would not round-trip through str().
+    # Numbers given as numbers are always written in canonical form.
+    if not isinstance(value, str):
+        return None
+    return None if value == str(parsed) else value
+
+
+class Product:
+    """One inventory row, with price, quantity and monthly_sales parsed once.
+
+    Attribute access gives the typed values. Item access (product["price"])
+    gives the CSV text, exactly as it was read, so rows written back out are
+    byte-for-byte what was loaded unless a field was changed.
+    """
+
+    __slots__ = (
+        "product_id", "name", "category", "last_updated", "extra",
+        "_price", "_price_text", "_quantity", "_quantity_text",
+        "_monthly_sales", "_monthly_sales_text",
+    )
+
+    def __init__(self, product_id, name, category, price=0.0, quantity=0, last_updated="",
+                 monthly_sales=None, extra=None):
+        self.product_id = product_id
+        self.name = name
+        self.category = category
+        self.price = price
+        self.quantity = quantity
+        self.last_updated = last_updated
+        self.monthly_sales = monthly_sales
+        self.extra = extra or None
+
+    @classmethod
+    def from_row(cls, row, strict=False):
+        """Build a Product from a csv.DictReader row.
+
+        With strict=True a price or quantity that does not parse, or a
+        quantity that is not a whole number, raises ValueError; otherwise it
+        reads as 0 and the text is kept as is.
+        """
+        product = cls.__new__(cls)
+        product.product_id = row["product_id"]
+        product.name = row["name"]
+        product.category = row["category"]
+        product.last_updated = row.get("last_updated", "")
+        extra = {
+            key: value for key, value in row.items()
+            if key is not None and key not in FIELDNAMES and key != "monthly_sales"
+        }
+        product.extra = extra or None
+        for field in ("price", "quantity", "monthly_sales"):
+            value = row.get(field)
+            try:
+                setattr(product, field, value)
+            except (TypeError, ValueError):
+                if strict and field != "monthly_sales":
+                    raise ValueError(f"invalid {field}: {value!r}")
+                setattr(product, field, None)
+                setattr(product, f"_{field}_text", value)
+        return product
+
+    @property
+    def price(self):
+        return self._price
+
+    @price.setter
+    def price(self, value):
+        if value is None:
+            self._price, self._price_text = 0.0, None
+            return
+        if isinstance(value, bool):
+            raise ValueError(f"not a price: {value!r}")
+        self._price = float(value)
+        self._price_text = _text(value, self._price)
+
+    @property
+    def quantity(self):
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, value):
+        if value is None:
+            self._quantity, self._quantity_text = 0, None
+            return
+        self._quantity = parse_count(value)
+        self._quantity_text = _text(value, self._quantity)
+
+    @property
+    def monthly_sales(self):
+        return self._monthly_sales
+
+    @monthly_sales.setter
+    def monthly_sales(self, value):
+        if value is None or value == "":
+            self._monthly_sales, self._monthly_sales_text = 0, ""
+            return
+        self._monthly_sales = parse_count(value)
+        self._monthly_sales_text = _text(value, self._monthly_sales)
+
+    # dict-style access to the CSV text
+
+    def __getitem__(self, field):
+        if field in ("price", "quantity", "monthly_sales"):
+            text = getattr(self, f"_{field}_text")
+            return str(getattr(self, field)) if text is None else text
+        if field in ("product_id", "name", "category", "last_updated"):
+            return getattr(self, field)
+        if self.extra and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        if field in ("product_id", "name", "category", "last_updated", "price", "quantity", "monthly_sales"):
+            setattr(self, field, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+
+    def __contains__(self, field):
+        try:
+            self[field]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def to_row(self):
+        """The row as CSV text; monthly_sales is left out when the row has none."""
+        row = {
+            "product_id": self.product_id,
+            "name": self.name,
+            "category": self.category,
+            "price": str(self._price) if self._price_text is None else self._price_text,
+            "quantity": str(self._quantity) if self._quantity_text is None else self._quantity_text,
+            "last_updated": self.last_updated,
+        }
+        if self._monthly_sales_text != "":
+            row["monthly_sales"] = str(self._monthly_sales) if self._monthly_sales_text is None else self._monthly_sales_text
+        if self.extra:
+            row.update(self.extra)
+        return row
+
+    def copy(self):
+        product = Product.__new__(Product)
+        product.product_id = self.product_id
+        product.name = self.name
+        product.category = self.category
+        product.last_updated = self.last_updated
+        product.extra = dict(self.extra) if self.extra else None
+        product._price = self._price
+        product._price_text = self._price_text
+        product._quantity = self._quantity
+        product._quantity_text = self._quantity_text
+        product._monthly_sales = self._monthly_sales
+        product._monthly_sales_text = self._monthly_sales_text
+        return product
+
+    def __repr__(self):
+        return repr(self.to_row())
+
+
+def validate_row(row):
+    """A cleaned-up Product for an imported row, or None if the row is invalid."""
+    try:
+        product = Product.from_row(row, strict=True)
+        product.product_id = product.product_id.strip()
+        product.name = product.name.strip().title()
+        product.category = product.category.strip().title()
+        product.price = parse_price(product.price)
+        product.last_updated = row["last_updated"].strip()
+        return product
+    except (KeyError, ValueError, AttributeError):
+        return None
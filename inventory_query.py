@@ -0,0 +1,219 @@
+import heapq
+from datetime import datetime
+
+from inventory_index import SORT_KEYS
+
+# Quantity ranges used to look a stock status up in the quantity index; the
+# status predicate still runs on the results, so "low stock" can include
+# negative quantities the same way stock_status() does.
+STOCK_RANGES = {
+    "out of stock": (0, 0),
+    "low stock": (None, 10),
+    "in stock": (11, None),
+}
+
+
+def stock_status(quantity):
+    if quantity == 0:
+        return "out of stock"
+    elif quantity <= 10:
+        return "low stock"
+    else:
+        return "in stock"
+
+
+STOCK_SQL = {
+    "out of stock": "quantity = 0",
+    "low stock": "quantity <= 10 AND quantity != 0",
+    "in stock": "quantity > 10",
+}
+
+
+def _range_sql(column, low, high):
+    clauses = []
+    params = []
+    if low is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(low)
+    if high is not None:
+        clauses.append(f"{column} <= ?")
+        params.append(high)
+    return " AND ".join(clauses) or "1", params
+
+
+def _bounds_text(low, high):
+    return f"[{'-inf' if low is None else low}, {'inf' if high is None else high}]"
+
+
+class Filter:
+    """One condition of a Query: a predicate, plus how an index can answer it."""
+
+    def __init__(self, description, predicate, sql, params=(), field=None, low=None, high=None, search=None):
+        self.description = description
+        self.predicate = predicate
+        self.sql = sql
+        self.params = list(params)
+        self.field = field
+        self.low = low
+        self.high = high
+        self.search = search
+
+
+class Query:
+    """Composable product filters, run in one pass over the catalog or an index.
+
+        Query().category("books").price_between(10, 50).run(store)
+
+    run() picks one access path: the trigram index for name_contains(),
+    otherwise the narrowest price or quantity index range, otherwise a
+    scan. Every other filter is checked against the rows that path returns.
+    Rows come back in catalog order unless order_by() asks for a field.
+    explain() describes the plan without running it. On an SQLite store
+    the filters and ordering become a single SQL query instead.
+    """
+
+    def __init__(self):
+        self.filters = []
+        self.order = None
+
+    def _add(self, *args, **kwargs):
+        self.filters.append(Filter(*args, **kwargs))
+        return self
+
+    def category(self, category):
+        category = category.strip().lower()
+        return self._add(
+            f"category == {category!r}",
+            lambda product: product.category.strip().lower() == category,
+            "lower(trim(category)) = ?", [category],
+        )
+
+    def price_between(self, low=None, high=None):
+        return self._add(
+            f"price in {_bounds_text(low, high)}",
+            lambda product: (low is None or product.price >= low) and (high is None or product.price <= high),
+            *_range_sql("price", low, high), field="price", low=low, high=high,
+        )
+
+    def quantity_between(self, low=None, high=None):
+        return self._add(
+            f"quantity in {_bounds_text(low, high)}",
+            lambda product: (low is None or product.quantity >= low) and (high is None or product.quantity <= high),
+            *_range_sql("quantity", low, high), field="quantity", low=low, high=high,
+        )
+
+    def stock_status(self, status):
+        status = status.strip().lower()
+        if status not in STOCK_RANGES:
+            raise ValueError(f"unknown stock status: {status!r}")
+        low, high = STOCK_RANGES[status]
+        return self._add(
+            f"stock status == {status!r}",
+            lambda product: stock_status(product.quantity) == status,
+            STOCK_SQL[status], field="quantity", low=low, high=high,
+        )
+
+    def name_contains(self, text):
+        text = text.strip().lower()
+        return self._add(
+            f"name contains {text!r}",
+            lambda product: text in product.name.lower(),
+            "instr(lower(name), ?) > 0", [text], search=text,
+        )
+
+    def updated_since(self, since):
+        if isinstance(since, datetime):
+            since = since.strftime("%Y-%m-%d %H:%M:%S")
+        return self._add(
+            f"last_updated >= {since!r}",
+            lambda product: bool(product.last_updated) and product.last_updated >= since,
+            "last_updated != '' AND last_updated >= ?", [since],
+        )
+
+    def order_by(self, field, reverse=False):
+        if field not in SORT_KEYS:
+            raise ValueError(f"cannot order by {field!r}")
+        self.order = (field, reverse)
+        return self
+
+    def _access(self, store):
+        """(filter used for access or None, estimated rows)."""
+        for item in self.filters:
+            # Shorter text only matches prefixes in the search index.
+            if item.search and len(item.search) >= 3:
+                return item, None
+        best, best_count = None, len(store)
+        for item in self.filters:
+            if item.field is not None:
+                count = store.range_count(item.field, item.low, item.high)
+                if best is None or count < best_count:
+                    best, best_count = item, count
+        return best, best_count
+
+    def _sql(self):
+        where = [item.sql for item in self.filters]
+        params = [param for item in self.filters for param in item.params]
+        order_by, reverse = self.order or (None, False)
+        return where, params, order_by, reverse
+
+    def explain(self, store):
+        if store.backend == "sqlite":
+            return "\n".join(["Query plan (SQLite):"] + [f"  {step}" for step in store.explain_select(*self._sql())])
+        access, estimate = self._access(store)
+        total = len(store)
+        lines = ["Query plan:"]
+        if access is None:
+            lines.append(f"  access: full scan ({total} rows)")
+        elif access.search:
+            lines.append(f"  access: name search index for {access.search!r}")
+        else:
+            lines.append(
+                f"  access: {access.field} index range {_bounds_text(access.low, access.high)}"
+                f" (~{estimate} of {total} rows)"
+            )
+        for item in self.filters:
+            lines.append(f"  filter: {item.description}")
+        if self.order is not None:
+            field, reverse = self.order
+            source = "index" if access is not None and access.field == field else "sort"
+            lines.append(f"  order: {field}{' descending' if reverse else ''} ({source})")
+        else:
+            lines.append("  order: catalog")
+        return "\n".join(lines)
+
+    def run(self, store, limit=None):
+        """Matching rows; with limit, only the first limit of them, picked without a full sort."""
+        if store.backend == "sqlite":
+            return store.select(*self._sql(), limit=limit)
+        access, _ = self._access(store)
+        ordered_by_index = (
+            access is not None and self.order is not None
+            and access.field == self.order[0] and not self.order[1]
+        )
+        if access is None:
+            candidates = store.rows()
+        elif access.search:
+            candidates = store.search(access.search)
+        else:
+            candidates = store.range(access.field, access.low, access.high, catalog_order=not ordered_by_index)
+
+        predicates = [item.predicate for item in self.filters]
+        # Rows already come out in their final order, so enough is enough.
+        enough = limit if self.order is None or ordered_by_index else None
+        results = []
+        for product in candidates:
+            for predicate in predicates:
+                if not predicate(product):
+                    break
+            else:
+                results.append(product)
+                if len(results) == enough:
+                    break
+
+        if self.order is not None and not ordered_by_index:
+            field, reverse = self.order
+            if limit is not None and limit < len(results):
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(limit, results, key=SORT_KEYS[field])
+            results.sort(key=SORT_KEYS[field], reverse=reverse)
+        return results if limit is None else results[:limit]
@@ -0,0 +1,243 @@
+"""Deterministic sample inventory generator.
+
+    python inventory_sample.py --rows 10000000 --seed 42 --file inventory.csv
+
+Rows are generated and written BATCH_ROWS at a time, so memory stays flat
+however many products are asked for. The same seed gives the same file
+(on the same day, since last_updated counts back from today); with NumPy
+installed the values are drawn in vectorized batches, which gives a
+different, equally reproducible, stream than the pure-Python fallback.
+"""
+import argparse
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import inventory_columns
+from inventory_columns import have_numpy
+
+CATEGORIES = ["Electronics", "Clothing", "Home", "Sports", "Beauty", "Books", "Food", "Toys", "Other"]
+
+PRODUCT_NAMES = {
+    "Electronics": [
+        "Wireless Earbuds", "Bluetooth Speaker", "Power Bank", "USB-C Cable", "Smart Watch",
+        "Webcam HD", "Wireless Mouse", "Mechanical Keyboard", "External SSD", "HDMI Cable"
+    ],
+    "Clothing": [
+        "T-Shirt Basic", "Denim Jeans", "Hoodie", "Athletic Socks", "Winter Jacket",
+        "Cotton Shorts", "Yoga Pants", "Casual Shirt", "Baseball Cap", "Wool Sweater"
+    ],
+    "Home": [
+        "Throw Pillow", "Ceramic Mug", "Bath Towel Set", "Kitchen Knife", "Cutting Board",
+        "Bed Sheets", "Scented Candle", "Picture Frame", "Storage Basket", "Wall Clock"
+    ],
+    "Sports": [
+        "Yoga Mat", "Jump Rope", "Water Bottle", "Resistance Bands", "Tennis Balls",
+        "Running Shorts", "Dumbbell Set", "Golf Balls", "Basketball", "Swimming Goggles"
+    ],
+    "Beauty": [
+        "Face Moisturizer", "Shampoo", "Body Lotion", "Facial Cleanser", "Hair Brush",
+        "Nail Polish", "Lip Balm", "Eye Shadow Palette", "Facial Mask", "Sunscreen"
+    ],
+    "Books": [
+        "Fiction Bestseller", "Cookbook", "Self-Help Guide", "Travel Guide", "History Book",
+        "Biography", "Children's Book", "Science Fiction", "Business Book", "Art Book"
+    ],
+    "Food": [
+        "Protein Bars", "Mixed Nuts", "Dark Chocolate", "Granola", "Coffee Beans",
+        "Herbal Tea", "Olive Oil", "Pasta", "Spice Mix", "Energy Drink"
+    ],
+    "Toys": [
+        "Building Blocks", "Stuffed Animal", "Puzzle Set", "Board Game", "Action Figure",
+        "Art Supplies", "Remote Car", "Card Game", "Educational Toy", "Frisbee"
+    ],
+    "Other": [
+        "Gift Card", "Phone Case", "Keychain", "Stickers Pack", "Notebook",
+        "Pen Set", "Calendar", "Umbrella", "Tote Bag", "Sunglasses"
+    ]
+}
+
+# Add some variation to avoid exact duplicates
+NAME_SUFFIXES = ["", " Pro", " Plus", " Mini", " XL", " Premium", " Lite", " Basic"]
+
+PRICE_RANGES = {
+    "Electronics": (15.99, 199.99),
+    "Clothing": (9.99, 89.99),
+    "Home": (7.99, 79.99),
+    "Sports": (8.99, 69.99),
+    "Beauty": (5.99, 49.99),
+    "Books": (10.99, 29.99),
+    "Food": (3.99, 19.99),
+    "Toys": (9.99, 39.99),
+    "Other": (4.99, 24.99)
+}
+
+# 70% of products have regular stock (10-100); the rest are low or out of
+# stock, with these weights for quantities 0-9.
+REGULAR_STOCK = 0.7
+QUANTITY_WEIGHTS = [1, 3, 5, 10, 20, 15, 10, 5, 3, 2]
+
+# last_updated falls within the last this many days.
+MAX_AGE_DAYS = 30
+
+FIELDNAMES = ["product_id", "name", "category", "price", "quantity", "last_updated", "monthly_sales"]
+
+BATCH_ROWS = 100_000
+
+# One CSV line per row, with the csv module's line ending.
+ROW = "%s,%s,%s,%r,%d,%s,%d\r\n"
+
+# Every name, indexed by (category * 10 + name) * len(NAME_SUFFIXES) + suffix.
+# None needs CSV quoting, so rows are written with plain string formatting.
+FULL_NAMES = [
+    f"{name}{suffix}"
+    for category in CATEGORIES
+    for name in PRODUCT_NAMES[category]
+    for suffix in NAME_SUFFIXES
+]
+
+
+class ProductIds:
+    """Distinct product IDs without remembering the ones already drawn.
+
+    ID number i is (a * i + c) mod 10**width, one step of a linear
+    congruential generator. With a coprime to 10**width that map is a
+    permutation, so IDs never repeat and look shuffled, and the ID space
+    is at least ten times the product count, so it never fills up.
+    """
+
+    def __init__(self, count, seed=None):
+        self.width = max(5, len(str(max(count - 1, 0))) + 1)
+        modulus = 10 ** self.width
+        rng = random.Random(seed)
+        multiplier = rng.randrange(modulus // 3, modulus)
+        while multiplier % 2 == 0 or multiplier % 5 == 0:
+            multiplier += 1
+        self.modulus = modulus
+        self.multiplier = multiplier
+        self.increment = rng.randrange(modulus)
+
+    def batch(self, start, stop):
+        a, c, m, width = self.multiplier, self.increment, self.modulus, self.width
+        return [f"P{(a * i + c) % m:0{width}d}" for i in range(start, stop)]
+
+
+def _dates(now):
+    return [
+        (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        for days in range(MAX_AGE_DAYS + 1)
+    ]
+
+
+def _python_batch(rng, ids, dates):
+    """Columns for one batch, drawn with the random module."""
+    names = []
+    categories = []
+    prices = []
+    quantities = []
+    updated = []
+    sales = []
+    stock_levels = range(10)
+    for _ in ids:
+        code = rng.randrange(len(CATEGORIES))
+        category = CATEGORIES[code]
+        names.append(FULL_NAMES[(code * 10 + rng.randrange(10)) * len(NAME_SUFFIXES) + rng.randrange(len(NAME_SUFFIXES))])
+        categories.append(category)
+        low, high = PRICE_RANGES[category]
+        prices.append(round(rng.uniform(low, high), 2))
+        if rng.random() < REGULAR_STOCK:
+            quantity = rng.randint(10, 100)
+        else:
+            quantity = rng.choices(stock_levels, weights=QUANTITY_WEIGHTS)[0]
+        quantities.append(quantity)
+        updated.append(dates[rng.randint(0, MAX_AGE_DAYS)])
+        sales.append(int(quantity * rng.uniform(0.1, 0.8)) + rng.randint(0, 5))
+    return names, categories, prices, quantities, updated, sales
+
+
+class _NumpyTables:
+    def __init__(self, dates):
+        np = inventory_columns.np
+        self.low = np.array([PRICE_RANGES[category][0] for category in CATEGORIES])
+        self.high = np.array([PRICE_RANGES[category][1] for category in CATEGORIES])
+        self.weights = np.array(QUANTITY_WEIGHTS, dtype=np.float64) / sum(QUANTITY_WEIGHTS)
+        self.names = np.array(FULL_NAMES, dtype=object)
+        self.categories = np.array(CATEGORIES, dtype=object)
+        self.dates = np.array(dates, dtype=object)
+
+
+def _numpy_batch(rng, ids, tables):
+    """Columns for one batch, each drawn as a single NumPy array."""
+    np = inventory_columns.np
+    count = len(ids)
+    codes = rng.integers(0, len(CATEGORIES), count)
+    names = (codes * 10 + rng.integers(0, 10, count)) * len(NAME_SUFFIXES) + rng.integers(0, len(NAME_SUFFIXES), count)
+    prices = np.round(rng.uniform(tables.low[codes], tables.high[codes]), 2)
+    quantities = np.where(
+        rng.random(count) < REGULAR_STOCK,
+        rng.integers(10, 101, count),
+        rng.choice(10, count, p=tables.weights),
+    )
+    updated = rng.integers(0, MAX_AGE_DAYS + 1, count)
+    sales = (quantities * rng.uniform(0.1, 0.8, count)).astype(np.int64) + rng.integers(0, 6, count)
+    return (
+        tables.names[names].tolist(), tables.categories[codes].tolist(), prices.tolist(),
+        quantities.tolist(), tables.dates[updated].tolist(), sales.tolist(),
+    )
+
+
+def generate_rows(count, seed=None, now=None, batch_rows=BATCH_ROWS):
+    """Yield lists of CSV rows (tuples in FIELDNAMES order), batch_rows at a time."""
+    ids = ProductIds(count, seed)
+    dates = _dates(now or datetime.now())
+    if have_numpy():
+        rng = inventory_columns.np.random.default_rng(seed)
+        tables = _NumpyTables(dates)
+    else:
+        rng = random.Random(seed)
+    for start in range(0, count, batch_rows):
+        batch_ids = ids.batch(start, min(start + batch_rows, count))
+        if have_numpy():
+            columns = _numpy_batch(rng, batch_ids, tables)
+        else:
+            columns = _python_batch(rng, batch_ids, dates)
+        yield list(zip(batch_ids, *columns))
+
+
+def write_sample(file_path="inventory.csv", count=25, seed=None, now=None):
+    """Replace file_path with count generated products; returns the row count.
+
+    The CSV is streamed to a temporary file and swapped in whole, so the
+    inventory is never seen half-written. With the SQLite backend it is
+    loaded into the database in one transaction instead.
+    """
+    from inventory_store import get_store
+
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", newline="") as csvfile:
+        csv.writer(csvfile).writerow(FIELDNAMES)
+        for rows in generate_rows(count, seed, now):
+            csvfile.write("".join([ROW % row for row in rows]))
+        csvfile.flush()
+        os.fsync(csvfile.fileno())
+    get_store(file_path).replace_file(temp_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a sample inventory CSV.")
+    parser.add_argument("--file", default="inventory.csv")
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--seed", type=int, help="same seed, same products")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    write_sample(args.file, args.rows, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {args.rows:,} sample products in {args.file} in {elapsed:.1f} s "
+          f"({args.rows / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Local HTTP/JSON inventory service.
+
+One process holds the catalog in memory and serves every client, so
+concurrent edits no longer overwrite each other's copy of inventory.csv.
+
+    python inventory_service.py --port 8765
+    python inventory_service.py --unix /tmp/inventory.sock
+
+GET  /products                  all products, or filtered with category,
+                                min_price, max_price, stock_status, name,
+                                updated_since and order_by parameters
+GET  /products/<id>             one product
+GET  /search?q=text             product_id or name contains text
+GET  /report                    totals and products per category
+GET  /forecast?months=N         demand forecast rows
+GET  /stats                     request, coalescing and commit counters
+POST /products                  add or update a product (JSON object)
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from inventory_actions import (ActionError, checked_price, checked_quantity, create_product, edit_product,
+                               forecast_demand, report_totals)
+from inventory_cache import result_cache
+from inventory_product import FIELDNAMES, parse_count
+from inventory_query import Query
+from inventory_store import get_store
+
+# Writes arriving within this many seconds of each other share one fsync.
+COMMIT_WINDOW = 0.002
+MAX_BATCH = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class InventoryService:
+    """Serves one store to many clients.
+
+    Store work runs on one worker thread, in order, so the event loop keeps
+    accepting requests while it runs. Identical reads that arrive while one
+    is still running wait for that result instead of computing it again.
+    Writes are queued; a single committer task journals everything queued
+    during COMMIT_WINDOW as one atomic batch with one fsync, then answers
+    every writer in the batch.
+    """
+
+    def __init__(self, file_path="inventory.csv", commit_window=COMMIT_WINDOW):
+        self.store = get_store(file_path)
+        self.commit_window = commit_window
+        self._inflight = {}
+        self._writes = []
+        self._wake = None
+        self._committer = None
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self.stats = {"requests": 0, "reads": 0, "coalesced": 0, "writes": 0, "commits": 0}
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._committer = asyncio.create_task(self._commit_loop())
+
+    async def stop(self):
+        if self._committer is not None:
+            self._committer.cancel()
+            try:
+                await self._committer
+            except asyncio.CancelledError:
+                pass
+        await self._flush()
+        self._worker.shutdown()
+
+    # reads
+
+    async def read(self, key, compute):
+        self.stats["reads"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(loop.run_in_executor(self._worker, compute))
+        self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def products(self, params):
+        query = Query()
+        if "category" in params:
+            query.category(params["category"])
+        if "min_price" in params or "max_price" in params:
+            query.price_between(_number(params, "min_price"), _number(params, "max_price"))
+        if "stock_status" in params:
+            try:
+                query.stock_status(params["stock_status"])
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        if "name" in params:
+            query.name_contains(params["name"])
+        if "updated_since" in params:
+            query.updated_since(params["updated_since"])
+        if "order_by" in params:
+            try:
+                query.order_by(params["order_by"], reverse=params.get("reverse") == "1")
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        return [product.to_row() for product in query.run(self.store)]
+
+    def product(self, product_id):
+        product = self.store.get(product_id)
+        if product is None:
+            raise HTTPError(404, f"no product {product_id!r}")
+        return product.to_row()
+
+    def search(self, params):
+        return [product.to_row() for product in self.store.search(params.get("q", "").strip().lower())]
+
+    def report(self):
+        count, quantity, value, categories = report_totals(self.store)
+        return {"products": count, "quantity": quantity, "value": value, "categories": categories}
+
+    def forecast(self, params):
+        months = int(_number(params, "months") or 1)
+        return list(forecast_demand(self.store, months).rows())
+
+    # writes
+
+    async def write(self, row):
+        if not isinstance(row.get("product_id"), str) or not row["product_id"]:
+            raise HTTPError(400, "product_id is required")
+        future = asyncio.get_running_loop().create_future()
+        self._writes.append((row, future))
+        self._wake.set()
+        return await future
+
+    def _commit(self, rows):
+        """Merge each row into its product and journal them all at once.
+
+        Returns, per row, the saved product row or the HTTPError for it.
+        Merges are redone if another process writes the inventory first.
+        """
+        return self.store.transact(lambda store: self._merge(rows))
+
+    def _merge(self, rows):
+        now = datetime.now()
+        results = []
+        for row in rows:
+            try:
+                results.append(self._merge_row(row, now).to_row())
+            except ActionError as e:
+                results.append(HTTPError(400, f"invalid product: {e}"))
+            except Exception as e:
+                # A bug hit by one request must not fail the rest of the batch.
+                results.append(HTTPError(500, f"{type(e).__name__}: {e}"))
+        return results
+
+    def _parse_row(self, row):
+        """The posted fields checked and converted; raises ActionError before anything is staged."""
+        unknown = set(row) - set(FIELDNAMES) - set(self.store.fieldnames) - {"monthly_sales"}
+        if unknown:
+            raise ActionError(f"unknown fields: {', '.join(sorted(unknown))}")
+        fields = {}
+        for field, value in row.items():
+            if field == "price":
+                fields[field] = checked_price(value)
+            elif field == "quantity":
+                fields[field] = checked_quantity(value)
+            elif field == "monthly_sales":
+                try:
+                    fields[field] = parse_count(value)
+                except (TypeError, ValueError):
+                    raise ActionError(f"Invalid monthly_sales: {value!r}") from None
+            elif not isinstance(value, str):
+                raise ActionError(f"{field} must be a string, not {value!r}")
+            else:
+                fields[field] = value
+        return fields
+
+    def _merge_row(self, row, now):
+        """Stage one posted row with the same checks as the menu and CLI; returns the product.
+
+        Every field is checked before the first put(), so a rejected row
+        stages nothing.
+        """
+        store = self.store
+        row = self._parse_row(row)
+        product_id = row["product_id"]
+        if product_id in store:
+            product = edit_product(store, product_id, row.get("name"), row.get("category"),
+                                   row.get("price"), row.get("quantity"), now)
+        else:
+            product = create_product(store, product_id, row.get("name"), row.get("category"),
+                                     row.get("price", 0.0), row.get("quantity", 0), now)
+        rest = {field: value for field, value in row.items()
+                if field not in ("product_id", "name", "category", "price", "quantity")}
+        if not rest:
+            return product
+        product = product.copy()
+        for field, value in rest.items():
+            product[field] = value
+        return store.put(product)
+
+    async def _commit_loop(self):
+        while True:
+            await self._wake.wait()
+            # Give concurrent writers a moment to join this batch.
+            if len(self._writes) < MAX_BATCH:
+                await asyncio.sleep(self.commit_window)
+            self._wake.clear()
+            await self._flush()
+
+    async def _flush(self):
+        while self._writes:
+            batch = self._writes[:MAX_BATCH]
+            del self._writes[:MAX_BATCH]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self._worker, self._commit, [row for row, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            else:
+                self.stats["writes"] += len(batch)
+                self.stats["commits"] += 1
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    # HTTP
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        key = (path, url.query)
+
+        if method == "POST" and path == "/products":
+            try:
+                row = json.loads(body or b"null")
+            except ValueError:
+                raise HTTPError(400, "body is not JSON")
+            if not isinstance(row, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            return await self.write(row)
+        if method != "GET":
+            raise HTTPError(405, f"{method} is not supported here")
+        if path == "/products":
+            return await self.read(key, lambda: self.products(params))
+        if path.startswith("/products/"):
+            product_id = path[len("/products/"):]
+            return await self.read(key, lambda: self.product(product_id))
+        if path == "/search":
+            return await self.read(key, lambda: self.search(params))
+        if path == "/report":
+            return await self.read(key, self.report)
+        if path == "/forecast":
+            return await self.read(key, lambda: self.forecast(params))
+        if path == "/stats":
+            return dict(self.stats, cache=result_cache.stats(), products=len(self.store))
+        raise HTTPError(404, f"no route for {path}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                self.stats["requests"] += 1
+                try:
+                    status, payload = 200, await self.route(method.upper(), target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _number(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number")
+
+
+async def _respond(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(file_path="inventory.csv", host="127.0.0.1", port=8765, unix=None, ready=None):
+    service = InventoryService(file_path)
+    await service.start()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"http://{host}:{server.sockets[0].getsockname()[1]}"
+    print(f"Inventory service for {file_path} listening on {where}", flush=True)
+    if ready is not None:
+        ready(server)
+    started = time.perf_counter()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+        print(f"Served {service.stats['requests']} requests in {time.perf_counter() - started:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the inventory over HTTP/JSON.")
+    parser.add_argument("--file", default="inventory.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.file, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from operator import mul
+
+from inventory_product import Product
+
+MAGIC = b"INVSNAP1"
+VERSION = 1
+
+# Marks a text column entry that is None rather than an empty string.
+NONE = b"\x00"
+
+NUMERIC_COLUMNS = (("price", "d"), ("quantity", "q"), ("monthly_sales", "q"), ("category", "i"))
+TEXT_COLUMNS = (
+    "product_id", "name", "last_updated",
+    "price_text", "quantity_text", "monthly_sales_text", "extra",
+)
+
+
+def snapshot_path(file_path):
+    return file_path + ".snap"
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def write_snapshot(path, products, fieldnames, csv_signature, generation=0):
+    """Write products as a columnar snapshot of the CSV with csv_signature.
+
+    generation is the store's compaction count, which tells apart two CSVs
+    whose size, mtime and recycled inode happen to match.
+
+    Numbers are stored as fixed-width native arrays and text as an offsets
+    array plus one UTF-8 blob per column, so readers can mmap the file and
+    use the columns without parsing anything.
+    """
+    numeric = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS}
+    offsets = {name: array("Q", [0]) for name in TEXT_COLUMNS}
+    blobs = {name: bytearray() for name in TEXT_COLUMNS}
+    categories = {}
+
+    for product in products:
+        numeric["price"].append(product.price)
+        numeric["quantity"].append(product.quantity)
+        numeric["monthly_sales"].append(product.monthly_sales)
+        numeric["category"].append(categories.setdefault(product.category, len(categories)))
+        texts = (
+            product.product_id, product.name, product.last_updated,
+            product._price_text, product._quantity_text, product._monthly_sales_text,
+            json.dumps(product.extra) if product.extra else "",
+        )
+        for name, text in zip(TEXT_COLUMNS, texts):
+            blob = blobs[name]
+            blob += NONE if text is None else text.encode("utf-8")
+            offsets[name].append(len(blob))
+
+    sections = []
+    for name, typecode in NUMERIC_COLUMNS:
+        sections.append((name, typecode, numeric[name].tobytes()))
+    for name in TEXT_COLUMNS:
+        # 32-bit offsets halve the offsets region unless a column passes 4 GiB.
+        typecode = "I" if len(blobs[name]) < 2 ** 32 else "Q"
+        sections.append((name + ".offsets", typecode, array(typecode, offsets[name]).tobytes()))
+        sections.append((name + ".data", "B", bytes(blobs[name])))
+
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "csv": list(csv_signature) if csv_signature else None,
+        "generation": generation,
+        "count": len(numeric["price"]),
+        "fieldnames": fieldnames,
+        "categories": list(categories),
+        "sections": {},
+    }
+    # The header records where each section starts, which depends on the
+    # header's own length, so size it with placeholder offsets first.
+    placeholder = json.dumps(dict(header, sections={name: [0, 0, "B"] for name, _, _ in sections}))
+    offset = _align(len(MAGIC) + 4 + len(placeholder) + 64 * len(sections))
+    for name, typecode, data in sections:
+        header["sections"][name] = [offset, len(data), typecode]
+        offset = _align(offset + len(data))
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    # Readers of the same CSV may all write its snapshot at once.
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, typecode, data in sections:
+            f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class Snapshot:
+    """A memory-mapped snapshot written by write_snapshot()."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError("not an inventory snapshot")
+            (length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+            start = len(MAGIC) + 4
+            header = json.loads(self._map[start:start + length])
+            if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+                raise ValueError("incompatible inventory snapshot")
+        except Exception:
+            self._map.close()
+            raise
+        self.csv_signature = tuple(header["csv"]) if header["csv"] else None
+        self.generation = header.get("generation")
+        self.count = header["count"]
+        self.fieldnames = header["fieldnames"]
+        self.categories = header["categories"]
+        self._sections = header["sections"]
+        self._views = {}
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        view = self._views.get(name)
+        if view is None:
+            offset, length, typecode = self._sections[name]
+            view = memoryview(self._map)[offset:offset + length].cast(typecode)
+            self._views[name] = view
+        return view
+
+    def text(self, name, i):
+        offsets = self.column(name + ".offsets")
+        data = self.column(name + ".data")
+        raw = data[offsets[i]:offsets[i + 1]]
+        if raw == NONE:
+            return None
+        return bytes(raw).decode("utf-8")
+
+    def texts(self, name):
+        """Every value of a text column, decoded in one pass."""
+        offsets = self.column(name + ".offsets")
+        data = bytes(self.column(name + ".data"))
+        values = []
+        for i in range(self.count):
+            raw = data[offsets[i]:offsets[i + 1]]
+            values.append(None if raw == NONE else raw.decode("utf-8"))
+        return values
+
+    def products(self):
+        price = self.column("price")
+        quantity = self.column("quantity")
+        monthly_sales = self.column("monthly_sales")
+        category = self.column("category")
+        columns = [self.texts(name) for name in TEXT_COLUMNS]
+        categories = self.categories
+        new = Product.__new__
+        for i, (product_id, name, last_updated, price_text, quantity_text, sales_text, extra) in enumerate(
+            zip(*columns)
+        ):
+            product = new(Product)
+            product.product_id = product_id
+            product.name = name
+            product.category = categories[category[i]]
+            product.last_updated = last_updated
+            product.extra = json.loads(extra) if extra else None
+            product._price = price[i]
+            product._price_text = price_text
+            product._quantity = quantity[i]
+            product._quantity_text = quantity_text
+            product._monthly_sales = monthly_sales[i]
+            product._monthly_sales_text = sales_text
+            yield product
+
+    def total_value(self):
+        return math.fsum(map(mul, self.column("price"), self.column("quantity")))
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        try:
+            self._map.close()
+        except BufferError:
+            # a NumPy array is still viewing the map; it closes with it
+            pass
+
+
+def open_snapshot(file_path, csv_signature, generation=0):
+    """The snapshot for file_path if it was built from csv_signature, else None."""
+    try:
+        snapshot = Snapshot(snapshot_path(file_path))
+    except (OSError, ValueError, KeyError):
+        return None
+    if snapshot.csv_signature != tuple(csv_signature) or snapshot.generation != generation:
+        snapshot.close()
+        return None
+    return snapshot
@@ -0,0 +1,393 @@
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+from inventory_index import SORT_KEYS
+from inventory_metrics import count, span
+from inventory_product import FIELDNAMES, Product
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    price_text TEXT,
+    quantity INTEGER NOT NULL,
+    quantity_text TEXT,
+    last_updated TEXT NOT NULL,
+    monthly_sales INTEGER NOT NULL,
+    monthly_sales_text TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS products_name ON products (lower(name));
+CREATE INDEX IF NOT EXISTS products_category ON products (lower(trim(category)));
+CREATE INDEX IF NOT EXISTS products_price ON products (price);
+CREATE INDEX IF NOT EXISTS products_quantity ON products (quantity);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+COLUMNS = (
+    "product_id", "name", "category", "price", "price_text", "quantity", "quantity_text",
+    "last_updated", "monthly_sales", "monthly_sales_text", "extra",
+)
+
+# rowid is the catalog order: an upsert keeps a product's rowid, just like
+# replacing a key in the CSV store's dict keeps its position.
+SELECT = f"SELECT {', '.join(COLUMNS)} FROM products"
+
+UPSERT = (
+    f"INSERT INTO products ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+    f"ON CONFLICT (product_id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+)
+
+SORT_COLUMNS = {
+    "name": "lower(name)",
+    "price": "price",
+    "quantity": "quantity",
+    "value": "price * quantity",
+}
+
+
+def _values(product):
+    return (
+        product.product_id, product.name, product.category,
+        product._price, product._price_text, product._quantity, product._quantity_text,
+        product.last_updated, product._monthly_sales, product._monthly_sales_text,
+        json.dumps(product.extra) if product.extra else None,
+    )
+
+
+def _product(row):
+    product = Product.__new__(Product)
+    (product.product_id, product.name, product.category,
+     product._price, product._price_text, product._quantity, product._quantity_text,
+     product.last_updated, product._monthly_sales, product._monthly_sales_text, extra) = row
+    product.extra = json.loads(extra) if extra else None
+    return product
+
+
+class SQLiteStore:
+    """The inventory in an SQLite database, with the same methods as InventoryStore.
+
+    Lookups, sorting, range filters, search and report totals run as SQL
+    against indexed columns instead of over a parsed copy of the catalog,
+    and put() updates a single row. Changes become durable on save().
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, file_path="inventory.db"):
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        # Concurrent writers wait on SQLite's own lock instead of failing.
+        self._db = sqlite3.connect(file_path, timeout=30, check_same_thread=False)
+        self._transacting = False
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._writes = 0
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'fieldnames'").fetchone()
+        self.fieldnames = json.loads(row[0]) if row else list(FIELDNAMES)
+
+    def _select(self, sql="", params=()):
+        with self._lock, span("store.query"):
+            products = [_product(row) for row in self._db.execute(f"{SELECT} {sql}", params)]
+        count("rows_read", len(products))
+        return products
+
+    def _scalar(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def refresh(self):
+        # Every read goes to the database, so there is nothing to reload.
+        pass
+
+    # reads
+
+    @property
+    def version(self):
+        """Changes on every write from this store and every commit from another connection."""
+        return self._scalar("PRAGMA data_version"), self._writes
+
+    def rows(self):
+        return self._select("ORDER BY rowid")
+
+    def get(self, product_id):
+        products = self._select("WHERE product_id = ?", (product_id,))
+        return products[0] if products else None
+
+    def __contains__(self, product_id):
+        return self._scalar("SELECT EXISTS (SELECT 1 FROM products WHERE product_id = ?)", (product_id,)) == 1
+
+    def __len__(self):
+        return self._scalar("SELECT COUNT(*) FROM products")
+
+    def has_name(self, name):
+        return self._scalar(
+            "SELECT EXISTS (SELECT 1 FROM products WHERE lower(name) = ?)", (name.strip().lower(),)
+        ) == 1
+
+    def search(self, query):
+        """Rows whose product_id or name contains query, case-insensitively."""
+        query = query.lower()
+        if len(query) < 3:
+            # As TrigramIndex: short queries only match the start of the
+            # product_id, the name or a word of the name.
+            prefix = re.sub(r"([\\%_])", r"\\\1", query) + "%"
+            return self._select(
+                "WHERE lower(product_id) LIKE ? ESCAPE '\\' OR lower(name) LIKE ? ESCAPE '\\' "
+                "OR lower(name) LIKE ? ESCAPE '\\' ORDER BY rowid", (prefix, prefix, "% " + prefix)
+            )
+        return self._select(
+            "WHERE instr(lower(product_id), ?) > 0 OR instr(lower(name), ?) > 0 ORDER BY rowid", (query, query)
+        )
+
+    def sorted_by(self, field, reverse=False):
+        """Rows ordered by name (case-insensitive), price or quantity."""
+        direction = "DESC" if reverse else "ASC"
+        return self._select(f"ORDER BY {SORT_COLUMNS[field]} {direction}, rowid {direction}")
+
+    def page(self, field, limit, after=None, reverse=False):
+        """(up to limit rows of sorted_by(field, reverse), cursor for the next page or None)."""
+        # A negative LIMIT means no limit to SQLite.
+        if limit < 1:
+            return [], None
+        column = SORT_COLUMNS[field]
+        direction, beyond = ("DESC", "<") if reverse else ("ASC", ">")
+        where = ""
+        params = []
+        if after is not None:
+            # A cursor whose product is gone compares with NULL and skips its value's ties.
+            where = (
+                f"WHERE {column} {beyond} ? OR ({column} = ? AND "
+                f"rowid {beyond} (SELECT rowid FROM products WHERE product_id = ?))"
+            )
+            params = [after[0], after[0], after[1]]
+        rows = self._select(f"{where} ORDER BY {column} {direction}, rowid {direction} LIMIT ?", params + [limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (SORT_KEYS[field](rows[-1]), rows[-1].product_id)
+
+    def top(self, field, n, reverse=False):
+        """The first n rows of sorted_by(field, reverse)."""
+        return self.page(field, n, reverse=reverse)[0]
+
+    def _range_where(self, field, low, high):
+        column = SORT_COLUMNS[field]
+        clauses = []
+        params = []
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(high)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def range(self, field, low=None, high=None, catalog_order=False):
+        """Rows with low <= field <= high, ordered by that field unless catalog_order is set."""
+        where, params = self._range_where(field, low, high)
+        order = "rowid" if catalog_order else f"{SORT_COLUMNS[field]}, rowid"
+        return self._select(f"{where} ORDER BY {order}", params)
+
+    def range_count(self, field, low=None, high=None):
+        where, params = self._range_where(field, low, high)
+        return self._scalar(f"SELECT COUNT(*) FROM products {where}", params)
+
+    def select(self, where, params, order_by=None, reverse=False, limit=None):
+        """Rows matching every SQL clause in where, in catalog order or by order_by."""
+        sql = "WHERE " + " AND ".join(where) if where else ""
+        if order_by is None:
+            sql += " ORDER BY rowid"
+        else:
+            direction = "DESC" if reverse else "ASC"
+            sql += f" ORDER BY {SORT_COLUMNS[order_by]} {direction}, rowid {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = list(params) + [limit]
+        return self._select(sql, params)
+
+    def explain_select(self, where, params, order_by=None, reverse=False):
+        sql = "WHERE " + " AND ".join(where) if where else ""
+        if order_by is not None:
+            sql += f" ORDER BY {SORT_COLUMNS[order_by]}{' DESC' if reverse else ''}"
+        with self._lock:
+            plan = self._db.execute(f"EXPLAIN QUERY PLAN {SELECT} {sql}", params).fetchall()
+        return [row[-1] for row in plan]
+
+    def columns(self):
+        # Report totals come from SQL aggregates instead of NumPy columns.
+        return None
+
+    def total_value(self):
+        return self._scalar("SELECT TOTAL(price * quantity) FROM products")
+
+    def report_totals(self):
+        """(product count, total quantity, total value, {category: product count})."""
+        with self._lock:
+            count, quantity, value = self._db.execute(
+                "SELECT COUNT(*), TOTAL(quantity), TOTAL(price * quantity) FROM products"
+            ).fetchone()
+            categories = self._db.execute(
+                "SELECT category, COUNT(*) FROM products GROUP BY category ORDER BY MIN(rowid)"
+            ).fetchall()
+        return count, int(quantity), value, dict(categories)
+
+    # writes
+
+    def _note_fields(self, product):
+        added = False
+        for key in product.extra or ():
+            if key not in self.fieldnames:
+                self.fieldnames.append(key)
+                added = True
+        if product.monthly_sales and "monthly_sales" not in self.fieldnames:
+            self.fieldnames.append("monthly_sales")
+            added = True
+        return added
+
+    def _write_fieldnames(self):
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES ('fieldnames', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (json.dumps(self.fieldnames),),
+        )
+
+    def put(self, product):
+        """Write one row; it is committed by the next save()."""
+        if not isinstance(product, Product):
+            product = Product.from_row(product)
+        with self._lock:
+            if self._note_fields(product):
+                self._write_fieldnames()
+            self._db.execute(UPSERT, _values(product))
+            self._writes += 1
+        count("rows_written")
+        return product
+
+    def put_many(self, products):
+        """put() every product; returns how many were not in the catalog yet."""
+        products = list(products)
+        with self._lock:
+            before = len(self)
+            if any([self._note_fields(product) for product in products]):
+                self._write_fieldnames()
+            self._db.executemany(UPSERT, (_values(product) for product in products))
+            self._writes += 1
+            count("rows_written", len(products))
+            return len(self) - before
+
+    def save(self, compact=True):
+        with self._lock:
+            if not self._transacting:
+                self._db.commit()
+
+    def commit(self, products, compact=True):
+        """Write products in one transaction, so either all or none are applied."""
+        with self._lock:
+            if self._transacting:
+                self.put_many(products)
+                return
+            self._db.commit()
+            try:
+                self.put_many(products)
+            except BaseException:
+                self._rollback()
+                raise
+            self._db.commit()
+
+    def _rollback(self):
+        self._db.rollback()
+        # Results cached from the rolled-back writes carry the current
+        # version, so move on to one that was never seen.
+        self._writes += 1
+
+    def transact(self, fn, compact=True):
+        """Run fn(store) and commit what it wrote, as one write transaction.
+
+        BEGIN IMMEDIATE takes SQLite's write lock before fn reads anything,
+        so no other writer can slip in between and fn never needs a retry.
+        """
+        with self._lock:
+            self._db.commit()
+            self._db.execute("BEGIN IMMEDIATE")
+            self._transacting = True
+            try:
+                result = fn(self)
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                self._transacting = False
+            self._db.commit()
+            return result
+
+    def replace_file(self, csv_path):
+        """Replace every product with those of a complete CSV written elsewhere, then delete it.
+
+        The counterpart of InventoryStore.replace_file: one transaction, so
+        readers see either the old catalog or the new one.
+        """
+        with open(csv_path, mode="r", newline="") as csvfile:
+            reader = csv.DictReader(csvfile)
+            fieldnames = list(reader.fieldnames or FIELDNAMES)
+            products = [Product.from_row(row) for row in reader]
+
+        def load(store):
+            store._db.execute("DELETE FROM products")
+            store.fieldnames = fieldnames
+            store._write_fieldnames()
+            store.put_many(products)
+
+        self.transact(load)
+        os.remove(csv_path)
+
+    def compact(self, background=False):
+        """Commit and fold the write-ahead log back into the database file."""
+        with self._lock:
+            self._db.commit()
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def wait(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+def sqlite_path(file_path):
+    """inventory.db for inventory.csv."""
+    return os.path.splitext(file_path)[0] + ".db"
+
+
+def migrate_csv(csv_path="inventory.csv", db_path=None):
+    """Copy the CSV inventory (and its journal) into a new SQLite database."""
+    from inventory_store import InventoryStore
+
+    db_path = db_path or sqlite_path(csv_path)
+    source = InventoryStore(csv_path)
+    products = source.rows()
+    target = SQLiteStore(db_path)
+    if len(target):
+        raise ValueError(f"{db_path} already has products")
+    target.fieldnames = list(source.fieldnames)
+    with target._lock:
+        target._write_fieldnames()
+        target.commit(products)
+    return len(products)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "inventory.csv"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else sqlite_path(csv_path)
+    print(f"Migrated {migrate_csv(csv_path, db_path)} products from {csv_path} to {db_path}")
@@ -0,0 +1,642 @@
+import atexit
+import csv
+import gc
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+from inventory_columns import build_columns, columns_from_snapshot
+from inventory_index import SORT_KEYS, SortedIndex, TrigramIndex
+from inventory_lock import FileLock
+from inventory_metrics import count, span
+from inventory_product import FIELDNAMES, Product
+from inventory_snapshot import open_snapshot, snapshot_path, write_snapshot
+
+# "sqlite" keeps the inventory in inventory.db instead of inventory.csv.
+BACKEND = os.environ.get("INVENTORY_BACKEND", "csv")
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Fold the journal back into the CSV once it grows past this many bytes.
+COMPACT_THRESHOLD = int(os.environ.get("INVENTORY_COMPACT_BYTES", 1024 * 1024))
+
+BULK_PUT_ROWS = 1000
+
+# Catalog versions are unique across every store in the process.
+_versions = itertools.count(1)
+
+
+@contextmanager
+def gc_paused():
+    """Hold off the cyclic garbage collector while building many short-lived objects.
+
+    With a large catalog loaded, every collection those allocations trigger
+    walks all of it, which can cost more than the work itself. The objects
+    built here hold no reference cycles, so nothing is left for later.
+    """
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def _fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ConflictError(Exception):
+    """Another process wrote the inventory after this store last read it."""
+
+
+class InventoryStore:
+    """Parsed inventory catalog keyed by product_id.
+
+    inventory.csv is the last compacted snapshot and inventory.csv.journal
+    holds every change made since, one JSON record per line. Both files are
+    only re-read when their mtime, size or inode changes on disk, so
+    repeated menu actions share one parsed copy of the catalog.
+
+    inventory.csv.snap is a binary columnar copy of inventory.csv. While it
+    is newer than the CSV it is memory-mapped instead of parsing the CSV,
+    and counts and report totals are read straight from its columns.
+
+    Writers from any process take inventory.csv.lock exclusively and bump
+    the write version kept in it. A save() from a store that last read an
+    older version raises ConflictError instead of writing; transact() turns
+    that into re-running the change on the fresh catalog. Compactions bump
+    a generation kept next to the version, which readers compare as well.
+    """
+
+    backend = "csv"
+
+    def __init__(self, file_path="inventory.csv", compact_threshold=None):
+        self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        self.compact_threshold = COMPACT_THRESHOLD if compact_threshold is None else compact_threshold
+        self.fieldnames = list(FIELDNAMES)
+        self._products = None
+        self._snapshot = None
+        self._pending = []
+        self._signature = None
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(file_path)
+        self._disk_version = 0
+        self._generation = 0
+        self._compactor = None
+        self._search_index = None
+        self._sorted_indexes = {}
+        self._columns = None
+        self._total_value = None
+        self._version = 0
+
+    def _stat_signature(self):
+        signature = []
+        for path in (self.file_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(signature)
+
+    def refresh(self):
+        with self._lock, self._file_lock.shared():
+            signature = self._stat_signature()
+            state = self._file_lock.state()
+            # Staged changes keep the catalog they were made against until
+            # save() either writes them or reports the conflict.
+            if self._loaded and (
+                self._pending or (signature == self._signature and state == (self._disk_version, self._generation))
+            ):
+                return
+            self._load(signature, state)
+
+    def _load(self, signature, state):
+        self._disk_version, self._generation = state
+        self._close_snapshot()
+        if signature[0] is not None:
+            self._snapshot = open_snapshot(self.file_path, signature[0], self._generation)
+        self._products = None
+        self.fieldnames = list(self._snapshot.fieldnames) if self._snapshot else list(FIELDNAMES)
+        self._pending = []
+        self._signature = signature
+        self._loaded = True
+        self._search_index = None
+        self._sorted_indexes = {}
+        self._columns = None
+        self._total_value = None
+        self._version = next(_versions)
+        if self._snapshot is None or signature[1] is not None:
+            self._materialize()
+
+    def _materialize(self):
+        with span("store.load"):
+            self._materialize_products()
+
+    def _materialize_products(self):
+        products = {}
+        fieldnames = self.fieldnames
+        if self._snapshot is not None:
+            for product in self._snapshot.products():
+                products[product.product_id] = product
+            count("rows_read", len(products))
+        elif self._signature[0] is not None:
+            with span("store.parse_csv"), open(self.file_path, mode="r", newline="") as csvfile:
+                reader = csv.DictReader(csvfile)
+                if reader.fieldnames:
+                    fieldnames = list(reader.fieldnames)
+                for row in reader:
+                    products[row["product_id"]] = Product.from_row(row)
+            count("rows_read", len(products))
+            count("bytes_read", self._signature[0][1])
+            self._write_snapshot(products.values(), fieldnames, self._signature[0], self._generation)
+        if self._signature[1] is not None:
+            count("bytes_read", self._signature[1][1])
+            for record in self._read_journal():
+                if record["op"] == "put":
+                    rows = [record["row"]]
+                elif record["op"] == "batch":
+                    rows = record["rows"]
+                else:
+                    continue
+                count("rows_read", len(rows))
+                for row in rows:
+                    for key in row:
+                        if key not in fieldnames and (key != "monthly_sales" or row[key]):
+                            fieldnames.append(key)
+                    products[row["product_id"]] = Product.from_row(row)
+        self._products = products
+        self.fieldnames = fieldnames
+
+    def _catalog(self):
+        self.refresh()
+        if self._products is None:
+            self._materialize()
+        return self._products
+
+    def _write_snapshot(self, products, fieldnames, csv_signature, generation):
+        try:
+            with span("store.write_snapshot"):
+                write_snapshot(snapshot_path(self.file_path), products, fieldnames, csv_signature, generation)
+        except OSError:
+            # A missing snapshot only costs speed, never correctness.
+            pass
+
+    def _close_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _read_journal(self):
+        with open(self.journal_path, mode="r", newline="") as journal:
+            for line in journal:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # a torn final record from a crash mid-append
+                    break
+
+    # reads
+
+    @property
+    def version(self):
+        """A number that changes whenever the catalog does, by put() or on disk."""
+        self.refresh()
+        return self._version
+
+    def rows(self):
+        return list(self._catalog().values())
+
+    def get(self, product_id):
+        return self._catalog().get(product_id)
+
+    def __contains__(self, product_id):
+        return product_id in self._catalog()
+
+    def __len__(self):
+        self.refresh()
+        if self._products is None:
+            return len(self._snapshot)
+        return len(self._products)
+
+    def has_name(self, name):
+        name = name.strip().lower()
+        return any(product.name.strip().lower() == name for product in self._catalog().values())
+
+    def search(self, query):
+        """Rows whose product_id or name contains query, case-insensitively."""
+        products = self._catalog()
+        if self._search_index is None:
+            with span("store.build_search_index"):
+                self._search_index = TrigramIndex().build(products.values())
+        return [products[product_id] for product_id in self._search_index.search(query)]
+
+    def _sorted_index(self, field):
+        products = self._catalog()
+        index = self._sorted_indexes.get(field)
+        if index is None:
+            with span("store.sort"):
+                index = self._sorted_indexes[field] = SortedIndex(field).build(products.values())
+        return index
+
+    def sorted_by(self, field, reverse=False):
+        """Rows ordered by name (case-insensitive), price or quantity."""
+        index = self._sorted_index(field)
+        product_ids = reversed(index) if reverse else iter(index)
+        return [self._products[product_id] for product_id in product_ids]
+
+    def page(self, field, limit, after=None, reverse=False):
+        """(up to limit rows of sorted_by(field, reverse), cursor for the next page or None).
+
+        after is the cursor returned with the previous page. The first page
+        is picked with a heap in one pass over the catalog rather than a
+        full sort; paging on builds the sorted index, once.
+        """
+        if limit < 1:
+            return [], None
+        key = SORT_KEYS[field]
+        with self._lock:
+            products = self._catalog()
+            if after is None and field not in self._sorted_indexes:
+                if reverse:
+                    # Ties come out last-first, as in a reversed index walk.
+                    rows = heapq.nlargest(limit + 1, reversed(products.values()), key=key)
+                else:
+                    rows = heapq.nsmallest(limit + 1, products.values(), key=key)
+            else:
+                rows = [products[product_id] for product_id in self._sorted_index(field).page(after, limit + 1, reverse)]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (key(rows[-1]), rows[-1].product_id)
+
+    def top(self, field, n, reverse=False):
+        """The first n rows of sorted_by(field, reverse), e.g. top("value", 10, reverse=True)."""
+        return self.page(field, n, reverse=reverse)[0]
+
+    def columns(self):
+        """NumPy columns of the catalog, or None when NumPy is not installed."""
+        self.refresh()
+        if self._columns is None:
+            if self._products is None:
+                self._columns = columns_from_snapshot(self._snapshot)
+            else:
+                self._columns = build_columns(self._products.values())
+        return self._columns
+
+    def range(self, field, low=None, high=None, catalog_order=False):
+        """Rows with low <= field <= high, ordered by that field unless catalog_order is set."""
+        index = self._sorted_index(field)
+        return [self._products[product_id] for product_id in index.range(low, high, catalog_order)]
+
+    def range_count(self, field, low=None, high=None):
+        return self._sorted_index(field).count(low, high)
+
+    def report_totals(self):
+        """(product count, total quantity, total value, {category: product count})."""
+        columns = self.columns()
+        if columns is not None:
+            count = {category: products for category, (products, _) in columns.category_counts().items()}
+            return len(self), columns.total_quantity(), columns.total_value(), count
+        total_quantity = 0
+        total_value = 0.0
+        count = {}
+        for product in self._catalog().values():
+            total_quantity += product.quantity
+            total_value += product.price * product.quantity
+            count[product.category] = count.get(product.category, 0) + 1
+        return len(self), total_quantity, total_value, count
+
+    def total_value(self):
+        """Sum of price * quantity over the catalog.
+
+        Computed once per load, then adjusted by put() as products change.
+        """
+        with self._lock:
+            self.refresh()
+            if self._total_value is None:
+                columns = self.columns()
+                if columns is not None:
+                    self._total_value = columns.total_value()
+                elif self._products is None:
+                    self._total_value = self._snapshot.total_value()
+                else:
+                    self._total_value = math.fsum(
+                        product.price * product.quantity for product in self._products.values()
+                    )
+            return self._total_value
+
+    # writes
+
+    def put(self, product):
+        """Stage a Product (or a row dict) to replace the one with its product_id."""
+        if not isinstance(product, Product):
+            product = Product.from_row(product)
+        with self._lock:
+            if self._products is None:
+                self._materialize()
+            for key in product.extra or ():
+                if key not in self.fieldnames:
+                    self.fieldnames.append(key)
+            if product.monthly_sales and "monthly_sales" not in self.fieldnames:
+                self.fieldnames.append("monthly_sales")
+            if self._total_value is not None:
+                previous = self._products.get(product.product_id)
+                if previous is not None:
+                    self._total_value -= previous.price * previous.quantity
+                self._total_value += product.price * product.quantity
+            self._products[product.product_id] = product
+            self._pending.append(product)
+            self._version = next(_versions)
+            if self._search_index is not None:
+                self._search_index.add(product)
+            for index in self._sorted_indexes.values():
+                index.add(product)
+            if self._columns is not None and not self._columns.update(product):
+                self._columns = None
+        return product
+
+    def put_many(self, products):
+        """put() every product; returns how many were not in the catalog yet."""
+        products = [product if isinstance(product, Product) else Product.from_row(product) for product in products]
+        with self._lock:
+            if self._products is None:
+                self._materialize()
+            catalog = self._products
+            if len(products) <= BULK_PUT_ROWS:
+                added = sum(product.product_id not in catalog for product in products)
+                for product in products:
+                    self.put(product)
+                return added
+
+            # Rebuilding the indexes and columns later is cheaper than
+            # thousands of updates, and the rest of put() is done once here.
+            self._search_index = None
+            self._sorted_indexes = {}
+            self._columns = None
+            added = 0
+            total = self._total_value
+            extra = {}
+            sales = False
+            for product in products:
+                previous = catalog.get(product.product_id)
+                if previous is None:
+                    added += 1
+                elif total is not None:
+                    total -= previous.price * previous.quantity
+                if total is not None:
+                    total += product.price * product.quantity
+                if product.extra:
+                    extra.update(dict.fromkeys(product.extra))
+                sales = sales or bool(product.monthly_sales)
+                catalog[product.product_id] = product
+            self._total_value = total
+            for key in extra:
+                if key not in self.fieldnames:
+                    self.fieldnames.append(key)
+            if sales and "monthly_sales" not in self.fieldnames:
+                self.fieldnames.append("monthly_sales")
+            self._pending.extend(products)
+            self._version = next(_versions)
+        return added
+
+    def save(self, compact=True):
+        """Append the changes made with put() to the journal and fsync it.
+
+        They go in as one record, so a crash mid-append keeps either all of
+        them or none. Raises ConflictError, dropping the changes, if another
+        process has written since this store read the catalog.
+        """
+        with self._lock, self._file_lock.exclusive():
+            if self._pending:
+                self._check_version()
+                with gc_paused():
+                    if len(self._pending) == 1:
+                        record = {"op": "put", "row": self._pending[0].to_row()}
+                    else:
+                        record = {"op": "batch", "rows": [product.to_row() for product in self._pending]}
+                    line = json.dumps(record) + "\n"
+                self._append_journal([line], len(self._pending))
+                self._pending = []
+            journal_size = self._signature[1][1] if self._signature[1] else 0
+        if compact and journal_size > self.compact_threshold:
+            self.compact(background=True)
+
+    def commit(self, products, compact=True):
+        """Write products as a single journal record, then put() them.
+
+        A crash mid-write leaves a torn last line, which replay skips, so
+        either every product in the batch is applied or none is.
+        """
+        products = list(products)
+        with self._lock, self._file_lock.exclusive():
+            self.save(compact=False)
+            if products:
+                self._check_version()
+                self._append_journal(
+                    [json.dumps({"op": "batch", "rows": [p.to_row() for p in products]}) + "\n"], len(products)
+                )
+                self.put_many(products)
+                self._pending = []
+        self.save(compact=compact)
+
+    def transact(self, fn, compact=True):
+        """Run fn(store), then save what it put(), as one compare-and-swap write.
+
+        fn reads the catalog and stages changes with put() or commit(). When
+        another process wrote in between, fn runs again on the fresh catalog
+        instead of overwriting that write; the retry holds the file lock, so
+        a busy inventory cannot starve it. If fn raises, what it staged is
+        dropped. Returns what fn returns.
+        """
+        # Holding the store lock keeps other threads, the background
+        # compactor included, from reloading the catalog under fn.
+        with self._lock:
+            try:
+                try:
+                    self.refresh()
+                    result = fn(self)
+                    self.save(compact=compact)
+                except ConflictError:
+                    with self._file_lock.exclusive():
+                        self.refresh()
+                        result = fn(self)
+                        self.save(compact=compact)
+            except BaseException:
+                self._rollback()
+                raise
+        return result
+
+    def _rollback(self):
+        # Read everything again next time, staged changes included.
+        self._pending = []
+        self._loaded = False
+
+    def _check_version(self):
+        version = self._file_lock.state()[0]
+        if version != self._disk_version:
+            self._rollback()
+            raise ConflictError(
+                f"{self.file_path} changed on disk (version {version}, read at {self._disk_version})"
+            )
+
+    def _append_journal(self, lines, rows):
+        # The version goes up before the append, so a crash in between costs
+        # a spurious conflict rather than a missed one. The version check has
+        # passed, so this catalog matches the disk even if another process
+        # compacted it meanwhile.
+        self._disk_version += 1
+        self._generation = self._file_lock.state()[1]
+        self._file_lock.set_state(self._disk_version, self._generation)
+        data = "".join(lines)
+        with span("store.write_journal"), open(self.journal_path, mode="a", newline="") as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+        count("rows_written", rows)
+        count("bytes_written", len(data))
+        self._signature = self._stat_signature()
+
+    def compact(self, background=False):
+        """Fold the journal into a fresh CSV, swapped in with an atomic rename."""
+        if not background:
+            # Wait outside the lock: the running compactor needs it to finish.
+            self.wait()
+            self._compact()
+            return
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact, daemon=True)
+                self._compactor.start()
+
+    def _compact(self):
+        with span("store.compact"):
+            self._compact_files()
+
+    def _compact_files(self):
+        with self._lock, self._file_lock.exclusive():
+            if self._pending:
+                # Unsaved changes are not on disk yet; the next save() compacts.
+                return
+            rows = list(self._catalog().values())
+            fieldnames = list(self.fieldnames)
+            signature = self._signature
+            generation = self._generation
+            offset = signature[1][1] if signature[1] else 0
+
+        # Other writers keep appending to the journal while the CSV is written.
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(temp_path, mode="w", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, restval="", extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(product.to_row() for product in rows)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+            count("rows_written", len(rows))
+            count("bytes_written", csvfile.tell())
+
+        with self._lock, self._file_lock.exclusive():
+            version, disk_generation = self._file_lock.state()
+            if disk_generation != generation or self._stat_signature()[0] != signature[0]:
+                # Another process compacted first.
+                os.remove(temp_path)
+                return
+            # Records other processes appended meanwhile are on disk but not
+            # in this catalog yet; if so, leave it looking stale so the next
+            # refresh() reads them.
+            current = version == self._disk_version and self._stat_signature() == self._signature
+            generation += 1
+            self._file_lock.set_state(version, generation)
+            os.replace(temp_path, self.file_path)
+            # Keep only the records appended while the CSV was being written.
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, mode="rb") as journal:
+                    journal.seek(offset)
+                    tail = journal.read()
+                if tail:
+                    with open(temp_path, mode="wb") as journal:
+                        journal.write(tail)
+                        journal.flush()
+                        os.fsync(journal.fileno())
+                    os.replace(temp_path, self.journal_path)
+                else:
+                    os.remove(self.journal_path)
+            _fsync_dir(self.file_path)
+            csv_signature = self._stat_signature()[0]
+            if current:
+                self._signature = self._stat_signature()
+                self._generation = generation
+            if self._products is not None:
+                self._close_snapshot()
+        self._write_snapshot(rows, fieldnames, csv_signature, generation)
+
+    def replace_file(self, csv_path):
+        """Swap in a complete CSV written elsewhere, dropping the journal.
+
+        Counts as a write, so stores holding staged changes against the old
+        catalog get a ConflictError.
+        """
+        with self._lock, self._file_lock.exclusive():
+            version, generation = self._file_lock.state()
+            self._file_lock.set_state(version + 1, generation + 1)
+            os.replace(csv_path, self.file_path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            _fsync_dir(self.file_path)
+            self._loaded = False
+
+    def wait(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+
+_stores = {}
+
+
+def get_store(file_path="inventory.csv"):
+    """The shared store for file_path.
+
+    Paths ending in .db (or .sqlite) open an SQLite store. With
+    INVENTORY_BACKEND=sqlite a .csv path opens the .db next to it instead,
+    migrating the CSV into it the first time.
+    """
+    if BACKEND == "sqlite" and file_path.endswith(".csv"):
+        from inventory_sqlite import migrate_csv, sqlite_path
+
+        csv_path, file_path = file_path, sqlite_path(file_path)
+        if not os.path.exists(file_path) and os.path.exists(csv_path):
+            migrate_csv(csv_path, file_path)
+    key = os.path.abspath(file_path)
+    store = _stores.get(key)
+    if store is None:
+        if file_path.endswith(SQLITE_SUFFIXES):
+            from inventory_sqlite import SQLiteStore
+
+            store = SQLiteStore(file_path)
+        else:
+            store = InventoryStore(file_path)
+        _stores[key] = store
+    return store
+
+
+@atexit.register
+def _finish_compactions():
+    for store in list(_stores.values()):
+        store.wait()
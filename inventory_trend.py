@@ -0,0 +1,87 @@
+"""Inventory value trend charts, on screen or written to PNG/SVG files.
+
+Long histories are cut down to about TREND_POINTS points before plotting:
+the history is split into equal buckets and each keeps its lowest and
+highest value, in time order, so spikes and dips survive at any zoom.
+Files are drawn on a standalone Agg figure, which needs no display, so
+they can be written from cron jobs and servers.
+"""
+from datetime import datetime
+
+# Points handed to matplotlib; a few thousand is more than a chart's width in pixels.
+TREND_POINTS = 2000
+
+FILE_FORMATS = (".png", ".svg")
+
+# Below this many points each one gets a marker, as the menu always drew them.
+MARKER_POINTS = 100
+
+
+def downsample(timestamps, values, points=TREND_POINTS):
+    """(timestamps, values) with at most about points entries, keeping each bucket's extremes.
+
+    Both arguments are sequences of the same length (array("d") is fastest:
+    slicing, min and max on it run in C). Short inputs come back unchanged.
+    """
+    count = len(values)
+    buckets = max(points // 2, 1)
+    if count <= points or count <= 2:
+        return timestamps, values
+    # An empty slice is a new container of the input's type.
+    sampled_timestamps = timestamps[:0]
+    sampled_values = values[:0]
+    for bucket in range(buckets):
+        start = bucket * count // buckets
+        stop = (bucket + 1) * count // buckets
+        chunk = values[start:stop]
+        low = start + chunk.index(min(chunk))
+        high = start + chunk.index(max(chunk))
+        for position in sorted({low, high}):
+            sampled_timestamps.append(timestamps[position])
+            sampled_values.append(values[position])
+    return sampled_timestamps, sampled_values
+
+
+def _title(dates):
+    return f"Inventory Value Trend ({dates[0]:%d %b %Y} to {dates[-1]:%d %b %Y})"
+
+
+def _draw(axes, dates, values):
+    axes.plot(dates, values, marker='o' if len(dates) <= MARKER_POINTS else None, linestyle='-', color='b')
+    axes.set_title(_title(dates))
+    axes.set_xlabel('Date')
+    axes.set_ylabel('Inventory Value (R)')
+    axes.tick_params(axis='x', labelrotation=45)
+    axes.grid(True)
+
+
+def render_trend(timestamps, values, path=None, points=TREND_POINTS):
+    """Plot values against POSIX timestamps; written to path (.png or .svg), or shown when path is None.
+
+    Returns the number of points plotted.
+    """
+    if path is not None and not path.lower().endswith(FILE_FORMATS):
+        raise ValueError(f"Charts can be saved as {' or '.join(FILE_FORMATS)} files.")
+    timestamps, values = downsample(timestamps, values, points)
+    dates = [datetime.fromtimestamp(timestamp) for timestamp in timestamps]
+
+    # matplotlib takes longer to import than the rest of the program
+    # to start, so only load it when a chart is actually drawn.
+    if path is None:
+        import matplotlib.pyplot as plt
+
+        figure = plt.figure(figsize=(10, 6))
+        _draw(figure.add_subplot(), dates, values)
+        figure.tight_layout()
+        plt.show()
+        return len(dates)
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    _draw(figure.add_subplot(), dates, values)
+    figure.tight_layout()
+    figure.savefig(path)
+    return len(dates)